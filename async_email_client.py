@@ -0,0 +1,162 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from .config_loader import Config
+from .email_client import EmailClient
+from .retry_policy import is_retryable_status, mailbox_of, parse_retry_after
+
+try:
+    import aiohttp
+except ImportError as e:
+    raise ImportError("AsyncEmailClient requires the aiohttp package.") from e
+
+GRAPH_URL = "https://graph.microsoft.com/v1.0"
+
+
+class AsyncEmailClient:
+    """
+    Asyncio counterpart of EmailClient, so a single event loop can poll thousands of mailboxes
+    concurrently over one shared connection pool instead of holding threads per mailbox.
+    Token acquisition, queries and payloads are delegated to a blocking EmailClient, with MSAL
+    calls run in a worker thread so they never stall the loop
+    """
+
+    def __init__(self, config: Config, email_client: Optional[EmailClient] = None):
+        self.config = config
+        self.email_client = email_client or EmailClient(config)
+        http_config = self.config.get("graph_http", {})
+        self.request_timeout = http_config.get("timeout", 30)
+        self.max_connections = http_config.get("async_max_connections", 100)
+        self.retry_policy = self.email_client.retry_policy  # Shared, so both clients draw on the same retry budgets
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._token_lock: Optional[asyncio.Lock] = None
+
+    async def __aenter__(self) -> "AsyncEmailClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Returns the shared session, creating it on first use since it must belong to the running loop"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+                headers={"Accept-Encoding": "gzip, deflate"},
+                cookie_jar=aiohttp.DummyCookieJar(),  # As with the blocking session, no cookies are kept
+            )
+            logger.info(f"Async Graph API session created (max_connections={self.max_connections})")
+        return self._session
+
+    async def close(self):
+        """Closes the shared Graph API connections"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def get_access_token(self) -> Optional[str]:
+        """Acquires an access token in a worker thread, one acquisition at a time so a cold cache is filled once"""
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+        async with self._token_lock:
+            return await asyncio.to_thread(self.email_client.get_access_token)
+
+    async def _make_graph_api_request(self, url: str, headers: Dict[str, str], method: str = "GET",
+                                      json_data: Optional[Dict[str, Any]] = None,
+                                      params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Makes a Graph API request over the shared session, returning its JSON body if it has one.
+        Failures are retried as EmailClient's are, by the shared retry policy
+        """
+        if method not in ("GET", "POST", "DELETE"):
+            raise ValueError(f"Invalid HTTP method: {method}")
+        session = self._get_session()
+        mailbox = mailbox_of(url)
+        for attempt in range(self.retry_policy.max_attempts):
+            try:
+                async with session.request(method, url, headers=headers, json=json_data, params=params) as response:
+                    response.raise_for_status()
+                    if response.status == 204 or not response.content_type.endswith("json"):
+                        await response.read()
+                        return None
+                    return await response.json()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if isinstance(e, aiohttp.ClientResponseError):
+                    retryable = is_retryable_status(e.status)
+                    retry_after = parse_retry_after(e.headers.get("Retry-After") if e.headers else None)
+                else:
+                    retryable = isinstance(e, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+                    retry_after = None
+                if retryable and self.retry_policy.should_retry(attempt, mailbox):
+                    delay = self.retry_policy.backoff(attempt, retry_after)
+                    logger.warning(
+                        f"Graph API request failed (attempt {attempt + 1}/{self.retry_policy.max_attempts}): {e}. Retrying in {delay:.1f} seconds...")
+                    await asyncio.sleep(delay)
+                else:
+                    logger.error(f"Graph API request failed after {attempt + 1} attempts: {e}")
+                    raise
+
+    async def get_emails(self, access_token: str, mailbox_address: str, delta_token: Optional[str] = None,
+                         email_filter: Optional[Dict] = None) -> Tuple[List[dict], Optional[str]]:
+        """Retrieves emails from a specified mailbox using delta queries with optional filtering"""
+        url = self.email_client._build_messages_url(mailbox_address, delta_token, email_filter)
+        headers = {"Authorization": f"Bearer {access_token}"}
+
+        try:
+            emails: List[dict] = []
+            delta_link = None
+            while url:
+                response_json = await self._make_graph_api_request(url, headers) or {}
+                emails.extend(response_json.get("value", []))
+                url = response_json.get("@odata.nextLink")
+                delta_link = response_json.get("@odata.deltaLink")
+
+            final_delta_token = None
+            if delta_link:
+                final_delta_token = delta_link.split("=")[-1]
+            return emails, final_delta_token
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Error retrieving emails: {e}")
+            return [], None
+
+    async def forward_message(self, access_token: str, user_id: str, message_id: str,
+                              comment: Optional[str] = None) -> bool:
+        """
+        Forwards the specified message to the distribution list, natively or as a copy as configured by
+        forward_mode, falling back to a copy if a native forward fails. Returns whether it was forwarded
+        """
+        headers = {"Authorization": f"Bearer {access_token}", "Content-Type": "application/json"}
+        message_url = f"{GRAPH_URL}/users/{user_id}/messages/{message_id}"
+        if self.config.get("forward_mode", "native") == "native":
+            try:
+                payload = self.email_client._create_native_forward_payload(comment)
+                await self._make_graph_api_request(f"{message_url}/forward", headers, method="POST", json_data=payload)
+                logger.info(f"Message {message_id} forwarded to distribution list.")
+                return True
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"Native forward of message {message_id} failed: {e}. Falling back to sending a copy.")
+
+        try:
+            original_message = await self._make_graph_api_request(message_url, headers)
+            send_data = self.email_client._create_forward_message_payload(original_message)
+            await self._make_graph_api_request(f"{GRAPH_URL}/users/{user_id}/sendMail", headers, method="POST", json_data=send_data)
+            logger.info(f"Message {message_id} forwarded to distribution list.")
+            return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Error forwarding message: {e}")
+            return False
+
+    async def delete_message(self, access_token: str, user_id: str, message_id: str) -> bool:
+        """Deletes the specified message, returning whether it was deleted"""
+        headers = {"Authorization": f"Bearer {access_token}"}
+        try:
+            await self._make_graph_api_request(f"{GRAPH_URL}/users/{user_id}/messages/{message_id}", headers, method="DELETE")
+            logger.info(f"Original message {message_id} deleted.")
+            return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Error deleting message {message_id}: {e}")
+            return False
@@ -0,0 +1,56 @@
+"""
+Benchmarks the streaming HTML-to-text extractor behind clean_email against the
+previous regex implementation on large, newsletter-style HTML bodies.
+
+    python benchmarks/bench_clean_email.py [--repeat N]
+"""
+import argparse
+import base64
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from html_text import html_to_text  # noqa: E402
+
+
+def legacy_clean_email(email_str: str) -> str:
+    """The regex clean_email this extractor replaced"""
+    clean_text = re.sub('<[^<]+?>', '', email_str)
+    clean_text = re.sub(r'\s+', ' ', clean_text).strip()
+    return clean_text.lower()
+
+
+def newsletter_html(sections: int, image_bytes: int) -> str:
+    """Builds a newsletter-like body with styles, scripts, tables, entities and inline base64 images"""
+    image = base64.b64encode(os.urandom(image_bytes)).decode("ascii")
+    style = "<style>" + " ".join(f".c{i} {{ color: #{i:06x}; margin: 0 auto; }}" for i in range(200)) + "</style>"
+    script = "<script>var tracking = {id: 'abc', items: [1, 2, 3]}; if (a < b) { track(); }</script>"
+    section = (
+        '<table width="100%" cellpadding="0"><tr><td class="c1">'
+        "<h2>Weekly update &amp; news</h2>"
+        "<p>Dear customer,&nbsp;we&#39;re sorry your order arrived late. Please contact support if the "
+        "problem persists.</p>"
+        f'<img alt="banner" src="data:image/png;base64,{image}">'
+        '<a href="https://example.com/?a=1&amp;b=2" title="read &gt; more">Read more</a>'
+        "</td></tr></table>"
+    )
+    return f"<html><head><title>News</title>{style}{script}</head><body>{section * sections}</body></html>"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'body':>10} {'legacy ms':>10} {'stream ms':>10} {'speedup':>8}")
+    for sections, image_bytes in [(10, 1024), (200, 8 * 1024), (500, 32 * 1024)]:
+        body = newsletter_html(sections, image_bytes)
+        legacy = min(timeit.repeat(lambda: legacy_clean_email(body), number=1, repeat=args.repeat))
+        stream = min(timeit.repeat(lambda: html_to_text(body), number=1, repeat=args.repeat))
+        print(f"{len(body) / 1e6:>8.2f}MB {legacy * 1e3:>10.2f} {stream * 1e3:>10.2f} {legacy / stream:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
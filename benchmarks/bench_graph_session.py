@@ -0,0 +1,96 @@
+"""
+Benchmarks Graph API request latency with a new connection per request (module-level
+requests.get, as before) against the pooled keep-alive session from graph_session.
+By default it runs against a local HTTP/1.1 server that serves a gzipped Graph-style
+JSON page; pass --url to measure a real endpoint, where TLS handshakes make the gap larger,
+e.g. --url https://graph.microsoft.com/v1.0/$metadata
+
+    python benchmarks/bench_graph_session.py [--requests N] [--threads N] [--url URL]
+"""
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from graph_session import create_graph_session  # noqa: E402
+
+PAGE = json.dumps({
+    "value": [{"id": f"AAMk{i}", "subject": "Order issue", "body": {"content": "<p>hello</p>" * 50}} for i in range(20)],
+}).encode("utf-8")
+GZIPPED_PAGE = gzip.compress(PAGE)
+
+
+class GraphStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep connections open between requests
+    disable_nagle_algorithm = True  # Headers and body go out in separate writes
+
+    def do_GET(self):
+        gzipped = "gzip" in self.headers.get("Accept-Encoding", "")
+        body = GZIPPED_PAGE if gzipped else PAGE
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def measure(get, url: str, count: int, threads: int) -> list:
+    """Returns the latency of each of count GETs, issued from threads concurrent workers"""
+    def timed(_):
+        started = time.perf_counter()
+        get(url).raise_for_status()
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(timed, range(count)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--url")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if not url:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), GraphStubHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/v1.0/users/me/messages"
+
+    session = create_graph_session(pool_maxsize=args.threads)
+    runs = [
+        ("new connection per request", lambda target: requests.get(target, timeout=30)),
+        ("pooled keep-alive session", lambda target: session.get(target, timeout=30)),
+    ]
+    print(f"{args.requests} GETs from {args.threads} threads against {url}")
+    print(f"{'':<28} {'p50 ms':>8} {'p95 ms':>8} {'total s':>8}")
+    for name, get in runs:
+        started = time.perf_counter()
+        latencies = sorted(measure(get, url, args.requests, args.threads))
+        total = time.perf_counter() - started
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"{name:<28} {statistics.median(latencies) * 1e3:>8.2f} {p95 * 1e3:>8.2f} {total:>8.2f}")
+
+    session.close()
+    if server:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
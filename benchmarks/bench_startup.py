@@ -0,0 +1,78 @@
+"""
+Benchmarks process startup: how long importing the complaint processor takes, whether that
+pulls in torch/transformers, and (given a config) the time until the first mailbox poll could
+start, i.e. until the ComplaintProcessor has loaded its model and keyword embeddings.
+Every sample runs in a fresh interpreter so nothing is already imported.
+
+    python benchmarks/bench_startup.py [--repeat N] [--config config.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import importlib, json, resource, sys, time
+start = time.perf_counter()
+from loguru import logger
+logger.remove()
+sys.path.insert(0, {root!r})
+processor_module = importlib.import_module("{package}.complaint_processor")
+result = {{"import_s": time.perf_counter() - start, "ml_loaded_at_import": "torch" in sys.modules}}
+if {config!r}:
+    config_module = importlib.import_module("{package}.config_loader")
+    config = config_module.Config({config!r}, {schema!r})
+    processor = processor_module.ComplaintProcessor(None, config)
+    result["first_poll_s"] = time.perf_counter() - start
+    processor.close()
+result["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps(result))
+"""
+
+EAGER_ML = """
+import json, time
+start = time.perf_counter()
+import torch, transformers
+print(json.dumps({"import_s": time.perf_counter() - start}))
+"""
+
+
+def run_child(code: str) -> dict:
+    """Runs code in a fresh interpreter and returns the JSON it prints last"""
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--config", help="config.json to measure time-to-first-poll with (loads the configured model)")
+    args = parser.parse_args()
+
+    config = os.path.abspath(args.config) if args.config else ""
+    code = CHILD.format(
+        root=os.path.dirname(REPO_DIR),
+        package=os.path.basename(REPO_DIR),
+        config=config,
+        schema=os.path.join(REPO_DIR, "config_schema.json"),
+    )
+    samples = [run_child(code) for _ in range(args.repeat)]
+    eager = [run_child(EAGER_ML)["import_s"] for _ in range(args.repeat)]
+
+    print(f"{'measure':<36} {'median':>9} {'min':>9}")
+    rows = [("import complaint_processor (s)", [s["import_s"] for s in samples])]
+    rows.append(("import torch + transformers (s)", eager))
+    if config:
+        rows.append(("time to first poll (s)", [s["first_poll_s"] for s in samples]))
+    rows.append(("max RSS (MB)", [s["max_rss_mb"] for s in samples]))
+    for name, values in rows:
+        print(f"{name:<36} {statistics.median(values):>9.3f} {min(values):>9.3f}")
+    print(f"torch loaded by the import: {samples[0]['ml_loaded_at_import']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import threading
+from typing import Any, Dict
+
+from .keyword_matcher import KeywordMatcher
+
+CASCADE_STAGES = ("lexical", "sentiment", "contextual")
+
+
+def lexical_score(matcher: KeywordMatcher, cleaned_body: str, cleaned_subject: str, subject_weight: float = 2.0) -> float:
+    """
+    Stage-0 score: distinct complaint keywords found in the body, plus the distinct
+    keywords in the subject weighted by subject_weight
+    """
+    body_keywords = {keyword for keyword, _ in matcher.find_all(cleaned_body)}
+    subject_keywords = {keyword for keyword, _ in matcher.find_all(cleaned_subject)}
+    return len(body_keywords) + subject_weight * len(subject_keywords)
+
+
+class CascadeStats:
+    """Thread-safe counters of how many emails each cascade stage settled or passed on"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {stage: {"entered": 0, "complaint": 0, "not_complaint": 0, "passed": 0} for stage in CASCADE_STAGES}
+
+    def record(self, stage: str, outcome: str):
+        """Records an email entering a stage and its outcome: complaint, not_complaint or passed"""
+        with self._lock:
+            counts = self._counts[stage]
+            counts["entered"] += 1
+            counts[outcome] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the per-stage counts with pass-through rates, and how much inference stage 0 avoided"""
+        with self._lock:
+            stages = {}
+            for stage, counts in self._counts.items():
+                entered = counts["entered"]
+                stages[stage] = dict(counts, pass_through_rate=counts["passed"] / entered if entered else 0.0)
+            lexical = self._counts["lexical"]
+            settled = lexical["complaint"] + lexical["not_complaint"]
+            stages["inference_avoided_rate"] = settled / lexical["entered"] if lexical["entered"] else 0.0
+            return stages
@@ -1,35 +1,242 @@
-import re
-from typing import Dict, Any, Tuple, List
-from sklearn.metrics.pairwise import cosine_similarity
-from transformers import pipeline, AutoTokenizer, AutoModel
+import hashlib
+import json
+import threading
+from bisect import bisect_right
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Any, Tuple, List, Optional
+from .classification_cascade import CascadeStats, lexical_score
 from .email_client import EmailClient
-from .utils import clean_email, load_keywords_from_file
+from .embedding_cache import EmbeddingCache
+from .exclusion_matcher import ExclusionMatcher
+from .inference import (
+    MAX_CHARS_PER_TOKEN,
+    InferenceBackend,
+    InferenceResult,
+    ProcessPoolBackend,
+    TextEncoding,
+    VERIFICATION_TEXTS,
+    configure_threads,
+    create_backend,
+    verify_backend,
+    warm_up,
+)
+from .inference_broker import InferenceBroker
+from .keyword_matcher import KeywordMatcher
+from .keyword_store import KeywordEmbeddingStore
+from .model_bundle import ModelBundle
+from .reply_stripper import strip_quoted_text
+from .sentence_segmenter import MAX_SENTENCE_CHARS, segment_sentences
+from .utils import clean_email, load_keywords_from_file, parse_interval
+from .verdict_cache import VerdictCache
 from .config_loader import Config
 from loguru import logger
 import time
-import json
-import torch
-import os  
+import numpy as np
+
+DEFAULT_SENTIMENT_MODEL = "cardiffnlp/twitter-roberta-base-sentiment"  # As in config_schema.json
+
+def normalize_rows(vectors) -> np.ndarray:
+    """Returns a contiguous float32 matrix whose rows have unit L2 norm (zero rows are left as zeros)"""
+    matrix = np.array(vectors, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return np.ascontiguousarray(matrix)
+
+def pinned(method):
+    """Runs a ComplaintProcessor method with the current model bundle pinned to the calling thread"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.pinned_bundle():
+            return method(self, *args, **kwargs)
+    return wrapper
 
 class ComplaintProcessor:
     def __init__(self, email_client: EmailClient, config: Config):
         self.email_client = email_client
         self.config = config
-        self.sentiment_classifier = None
-        self.tokenizer = AutoTokenizer.from_pretrained(self.config.sentiment_model)
-        self.model = AutoModel.from_pretrained(self.config.sentiment_model)
-        self.reload_sentiment_pipeline()
-        self.reload_keywords()
-
-    def reload_sentiment_pipeline(self):
-        """Attempts to initialize sentiment analysis pipeline with retries"""
-        max_retries = self.config.sentiment_pipeline_max_retries
-        retry_delay = self.config.sentiment_pipeline_retry_delay
+        cache_config = self.config.get("embedding_cache", {})
+        self.embedding_cache: Optional[EmbeddingCache] = None
+        if cache_config.get("enabled", True):
+            self.embedding_cache = EmbeddingCache(
+                cache_config.get("max_entries", 10000), cache_config.get("max_bytes", 64 * 1024 * 1024)
+            )
+        self.cascade_stats = CascadeStats()
+        self._exclusion_matcher: Optional[ExclusionMatcher] = None
+        self._exclusion_source: Tuple[Tuple[str, ...], Tuple[str, ...]] = ((), ())
+        verdict_config = self.config.get("verdict_cache", {})
+        self.verdict_cache: Optional[VerdictCache] = None
+        if verdict_config.get("enabled", False):
+            self.verdict_cache = VerdictCache(
+                verdict_config.get("path", "verdict_cache.sqlite3"),
+                parse_interval(verdict_config.get("ttl", "168h")),
+                verdict_config.get("max_entries", 100000),
+            )
+        batching_config = self.config.get("inference_batching", {})
+        self.inference_broker: Optional[InferenceBroker] = None
+        if batching_config.get("enabled", False):
+            self.inference_broker = InferenceBroker(
+                batching_config.get("max_batch_size", 32),
+                batching_config.get("max_wait_ms", 10),
+            )
+        self._bundle: Optional[ModelBundle] = None
+        self._bundle_lock = threading.Lock()
+        self._pinned = threading.local()
+        self._reload_lock = threading.Lock()
+        self._reload_thread: Optional[threading.Thread] = None
+        self._reload_pending = False
+        self._closed = False
+        self.reload()
+
+    def close(self):
+        """Stops the background inference thread and worker processes and closes the verdict cache, if any"""
+        if self.inference_broker:
+            self.inference_broker.close()
+        with self._bundle_lock:
+            self._closed = True
+            bundle, self._bundle = self._bundle, None
+        if bundle:
+            bundle.retire()
+        if self.verdict_cache:
+            self.verdict_cache.close()
+
+    def reload(self, force_backbone: bool = False):
+        """Rebuilds the model and keyword artifacts on the calling thread and swaps them in"""
+        bundle = self._build_bundle(self._bundle, force_backbone)
+        if bundle:
+            self._swap_bundle(bundle)
+
+    def schedule_reload(self):
+        """
+        Rebuilds the model and keyword artifacts on a background thread and swaps them in once ready,
+        so mail processing never waits on a reload. Requests made during a reload are coalesced into one more
+        """
+        with self._reload_lock:
+            if self._reload_thread is not None:
+                self._reload_pending = True
+                return
+            self._reload_thread = threading.Thread(target=self._reload_in_background, name="model-reload", daemon=True)
+            self._reload_thread.start()
+
+    def _reload_in_background(self):
+        """Reload thread: rebuilds until no further reload has been requested, keeping the current model on failure"""
+        while True:
+            try:
+                self.reload()
+            except Exception as e:
+                logger.exception(f"Background model reload failed, keeping the current model: {e}")
+            with self._reload_lock:
+                if not self._reload_pending:
+                    self._reload_thread = None
+                    return
+                self._reload_pending = False
+
+    def _build_bundle(self, current: Optional[ModelBundle], force_backbone: bool = False) -> Optional[ModelBundle]:
+        """
+        Builds a bundle for the current config, reusing the current backbone when its settings are unchanged.
+        Returns None if nothing changed
+        """
+        backend_settings = self._backend_settings()
+        if current and not force_backbone and current.backend_settings == backend_settings:
+            backbone = current.backbone
+        else:
+            backbone = self.load_sentiment_pipeline(backend_settings)
+
+        # Sorted by length so longer keywords are preferred
+        complaint_keywords = sorted(load_keywords_from_file(self.config.get("complaint_keywords_file", "complaint_keywords.txt")), key=len, reverse=True)
+        if current and backbone is current.backbone and complaint_keywords == current.complaint_keywords:
+            return None
+        try:
+            keyword_matrix = self.generate_keyword_embeddings(backbone, complaint_keywords)
+        except Exception:
+            if not current or backbone is not current.backbone:
+                backbone.close()
+            raise
+        logger.info("Complaint keywords reloaded.")
+        return ModelBundle(
+            backbone,
+            backend_settings,
+            complaint_keywords,
+            KeywordMatcher(complaint_keywords),
+            keyword_matrix,
+            hashlib.sha256("\n".join(complaint_keywords).encode("utf-8")).hexdigest(),
+        )
+
+    def _swap_bundle(self, bundle: ModelBundle):
+        """Makes bundle the one new classifications use and retires the previous one"""
+        with self._bundle_lock:
+            if self._closed:
+                bundle.retire()
+                return
+            previous, self._bundle = self._bundle, bundle
+        if previous:
+            if previous.backbone is not bundle.backbone and self.embedding_cache:
+                self.embedding_cache.clear()
+            previous.retire(bundle)
+            logger.info(f"Swapped in model {bundle.model_id} with {len(bundle.complaint_keywords)} complaint keywords")
+
+    @contextmanager
+    def pinned_bundle(self):
+        """
+        Pins the current bundle to the calling thread for the duration of the block, so a classification
+        runs start to finish on one model even if a reload swaps in another meanwhile
+        """
+        bundle = getattr(self._pinned, "bundle", None)
+        if bundle is not None:
+            yield bundle  # Already pinned by an outer call
+            return
+        with self._bundle_lock:
+            bundle = self._bundle
+            if bundle is None:
+                raise RuntimeError("The complaint processor has been closed")
+            bundle.acquire()
+        self._pinned.bundle = bundle
+        try:
+            yield bundle
+        finally:
+            self._pinned.bundle = None
+            bundle.release()
+
+    def _active_bundle(self) -> ModelBundle:
+        """Returns the bundle pinned to this thread, or the current one"""
+        return getattr(self._pinned, "bundle", None) or self._bundle
+
+    @property
+    def backbone(self) -> InferenceBackend:
+        return self._active_bundle().backbone
+
+    @property
+    def complaint_keywords(self) -> List[str]:
+        return self._active_bundle().complaint_keywords
+
+    @property
+    def keyword_matcher(self) -> KeywordMatcher:
+        return self._active_bundle().keyword_matcher
+
+    @property
+    def keyword_index(self) -> Dict[str, int]:
+        return self._active_bundle().keyword_index
+
+    @property
+    def keyword_matrix(self) -> np.ndarray:
+        return self._active_bundle().keyword_matrix
+
+    @property
+    def model_id(self) -> str:
+        """Identifies the loaded model, revision and engine, for keying cached model outputs"""
+        return self.backbone.model_id
+
+    def load_sentiment_pipeline(self, backend_settings: Dict[str, Any]) -> InferenceBackend:
+        """Attempts to load the shared sentiment/embedding backbone with retries"""
+        max_retries = self.config.get("sentiment_pipeline_max_retries", 3)
+        retry_delay = self.config.get("sentiment_pipeline_retry_delay", 5)
         for attempt in range(max_retries):
             try:
-                self.sentiment_classifier = pipeline("sentiment-analysis", model=self.config.sentiment_model)
-                logger.info(f"Initialized sentiment analysis pipeline with model: {self.config.sentiment_model}")
-                return  # Success, exit the function
+                backbone = self._create_backend(backend_settings)
+                logger.info(f"Initialized sentiment analysis backbone with model: {backend_settings['model_name']}")
+                if self.config.get("warm_up", True):
+                    warm_up(backbone)
+                return backbone
             except OSError as e:
                 if attempt < max_retries - 1:
                     logger.warning(f"Error connecting to the sentiment analysis pipeline (attempt {attempt + 1}/{max_retries}): {e}. Retrying in {retry_delay} seconds...")
@@ -41,100 +248,239 @@ class ComplaintProcessor:
                 logger.exception(f"Unexpected error during sentiment analysis pipeline initialization: {e}")
                 raise
 
-    def reload_keywords(self):
-        """
-        Loads keywords from files, sorting by length. 
-        Regenerates embeddings if keywords change
-        """
-        new_complaint_keywords = sorted(load_keywords_from_file(self.config.complaint_keywords_file), key=len, reverse=True)
-        if new_complaint_keywords != self.complaint_keywords:
-            self.complaint_keywords = new_complaint_keywords
-            self.keyword_embeddings = self.generate_keyword_embeddings()
-            logger.info("Complaint keywords reloaded.")
-
-    def generate_keyword_embeddings(self):
-        """Generates embeddings for complaint keywords, caching them to a file"""
-        cache_file = "keyword_embeddings.json"
-        
-        # Check if keywords have changed or if cache file doesn't exist
-        if not os.path.exists(cache_file) or set(self.complaint_keywords) != set(self._load_cached_keywords(cache_file)):
-            
-            logger.info("Generating keyword embeddings...")
-            keyword_embeddings = {}
-            for keyword in self.complaint_keywords:
-                keyword_embeddings[keyword] = self.get_embedding(keyword)
-            
-            # Save embeddings to cache file
-            self._save_keyword_embeddings(keyword_embeddings, cache_file)
-            logger.info(f"Keyword embeddings saved to {cache_file}")
+    def _backend_settings(self) -> Dict[str, Any]:
+        """Collects every setting that determines the backbone, so a reload can tell whether it must rebuild it"""
+        backend_config = self.config.get("inference_backend", {})
+        threads_config = self.config.get("inference_threads", {})
+        return {
+            "model_name": self.config.get("sentiment_model", DEFAULT_SENTIMENT_MODEL),
+            "revision": self.config.get("sentiment_model_revision"),
+            "engine": backend_config.get("engine", "torch"),
+            "quantize": backend_config.get("quantize", False),
+            "cache_dir": backend_config.get("onnx_cache_dir", "onnx_models"),
+            "intra_op_threads": threads_config.get("intra_op"),
+            "inter_op_threads": threads_config.get("inter_op"),
+            "processes": self.config.get("inference_processes", 0),
+            "verify": backend_config.get("verify", True),
+            "verify_tolerance": backend_config.get("verify_tolerance", 0.05),
+        }
+
+    def _create_backend(self, backend_settings: Dict[str, Any]) -> InferenceBackend:
+        """Builds the configured inference backend, checking non-torch engines against the torch reference"""
+        backend_kwargs = dict(backend_settings)
+        processes = backend_kwargs.pop("processes")
+        verify = backend_kwargs.pop("verify")
+        verify_tolerance = backend_kwargs.pop("verify_tolerance")
+        # torch backends take their thread counts from the process, so they are applied on every rebuild
+        if backend_kwargs["intra_op_threads"] or backend_kwargs["inter_op_threads"]:
+            configure_threads(backend_kwargs["intra_op_threads"], backend_kwargs["inter_op_threads"])
+        if processes > 0:
+            backend = ProcessPoolBackend(processes, backend_kwargs)
         else:
-            # Load embeddings from cache file
-            keyword_embeddings = self._load_keyword_embeddings(cache_file)
-            logger.info(f"Keyword embeddings loaded from {cache_file}")
+            backend = create_backend(**backend_kwargs)
 
-        return keyword_embeddings
+        engine = backend_kwargs["engine"]
+        if engine != "torch" and verify:
+            reference = create_backend(backend_kwargs["model_name"], backend_kwargs["revision"])
+            if not verify_backend(backend, reference, VERIFICATION_TEXTS, verify_tolerance):
+                logger.error(f"The {engine} backend is outside tolerance of the torch backend. Falling back to torch.")
+                backend.close()
+                return reference
+        return backend
 
-    def _load_cached_keywords(self, cache_file: str) -> List[str]:
-        """Loads keywords from the cache file"""
-        try:
-            with open(cache_file, "r") as f:
-                cached_data = json.load(f)
-            return list(cached_data.keys())
-        except:
-            return []
-
-    def _save_keyword_embeddings(self, keyword_embeddings: Dict[str, Any], cache_file: str):
-        """Saves keyword embeddings to a JSON file"""
-        with open(cache_file, "w") as f:
-            json.dump(keyword_embeddings, f, indent=4)
-
-    def _load_keyword_embeddings(self, cache_file: str) -> Dict[str, Any]:
-        """Loads keyword embeddings from a JSON file"""
-        with open(cache_file, "r") as f:
-            return json.load(f)
+    def generate_keyword_embeddings(self, backbone: InferenceBackend, complaint_keywords: List[str]) -> np.ndarray:
+        """Returns normalized embeddings for complaint keywords, embedding only those missing from the on-disk cache"""
+        store = KeywordEmbeddingStore(self.config.get("keyword_embedding_cache_dir", "keyword_embeddings"), backbone.model_id)
+        return store.get_matrix(complaint_keywords, lambda keywords: normalize_rows(backbone.run(keywords).embeddings))
 
     def get_embedding(self, text: str):
         """Generates an embedding for a given text"""
-        inputs = self.tokenizer(text, return_tensors="pt", padding=True, truncation=True, max_length=512)
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-        # Use the average of the last hidden states as the embedding
-        embeddings = outputs.last_hidden_state.mean(dim=1).squeeze().numpy()
-        return embeddings
-
-    def get_contextual_score(self, email_body: str) -> float:
-        """Calculates a contextual complaint score based on keyword embeddings and email body embedding"""
-        email_embedding = self.get_embedding(email_body)
+        return self.get_embeddings([text])[0]
+
+    def get_embeddings(self, texts: List[str]):
+        """Generates embeddings for a batch of texts in a single forward pass"""
+        return self.infer(texts).embeddings
+
+    @pinned
+    def infer(self, texts: List[str]) -> InferenceResult:
+        """Runs the shared backbone once over a batch of texts, serving repeated texts from the embedding cache"""
+        if not self.embedding_cache:
+            return self._run_backbone(texts)
+        model_id = self.model_id
+        return self._infer_cached(texts, [EmbeddingCache.make_key(text, model_id) for text in texts], False)
+
+    @pinned
+    def infer_ids(self, rows: List[List[int]]) -> InferenceResult:
+        """Like infer, for rows of token ids taken from an encoding, so nothing is tokenized again"""
+        if not self.embedding_cache:
+            return self._run_backbone(rows, pretokenized=True)
+        variant = f"{self.model_id}#ids"
+        keys = [EmbeddingCache.make_key(" ".join(map(str, row)), variant) for row in rows]
+        return self._infer_cached(rows, keys, True)
+
+    def _infer_cached(self, items: List, keys: List[str], pretokenized: bool) -> InferenceResult:
+        """Serves items from the embedding cache by key and runs the distinct misses through the backbone in one batch"""
+        outputs: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        missing: Dict[str, Any] = {}
+        for key, item in zip(keys, items):
+            if key in outputs or key in missing:
+                continue
+            cached = self.embedding_cache.get(key)
+            if cached is None:
+                missing[key] = item
+            else:
+                outputs[key] = cached
+
+        if missing:
+            result = self._run_backbone(list(missing.values()), pretokenized)
+            for row, key in enumerate(missing):
+                # Copy the rows so cache entries do not keep the whole batch alive
+                outputs[key] = (result.logits[row].copy(), result.embeddings[row].copy())
+                self.embedding_cache.put(key, outputs[key])
+
+        return InferenceResult(
+            np.stack([outputs[key][0] for key in keys]),
+            np.stack([outputs[key][1] for key in keys]),
+        )
+
+    def _run_backbone(self, items: List, pretokenized: bool = False) -> InferenceResult:
+        """Runs texts, or rows of token ids, through the backbone, via the micro-batching broker when it is enabled"""
+        if self.inference_broker:
+            return self.inference_broker.submit(items, self.backbone, pretokenized).result()
+        return self.backbone.run_ids(items) if pretokenized else self.backbone.run(items)
+
+    def encode_email(self, text: str) -> Optional[TextEncoding]:
+        """
+        Tokenizes a cleaned email once for every model stage. Only the head that the sentiment stage can use is
+        encoded, so long bodies cost no more than the token budget; later stages fall back to text past it.
+        Returns None if tokenization fails
+        """
+        chunk_config = self.config.get("chunked_sentiment", {})
+        if chunk_config.get("enabled", False):
+            max_tokens = chunk_config.get("max_tokens_per_email", 4096)
+        else:
+            max_tokens = self.backbone.max_length
+        head = text[:max_tokens * MAX_CHARS_PER_TOKEN]
+        try:
+            encoding = self.backbone.encode(head)
+            encoding.text_length = len(head)
+            return encoding
+        except Exception as e:
+            logger.error(f"Error tokenizing email: {e}")
+            return None
+
+    @pinned
+    def get_contextual_score(self, email_body: str, email_embedding: Optional[np.ndarray] = None,
+                             encoding: Optional[TextEncoding] = None) -> float:
+        """
+        Calculates a contextual complaint score based on keyword embeddings and email body embedding.
+        Pass email_embedding when the body has already been through the backbone to skip re-embedding it,
+        and the body's encoding to take sentences as token spans of it instead of tokenizing each one.
+        Sentences past the encoded head of the body are embedded from their text
+        """
         total_score = 0
 
-        sentences = re.split(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?)\s', email_body)
+        sentences = segment_sentences(
+            email_body, self.config.get("contextual_check", {}).get("max_sentence_chars", MAX_SENTENCE_CHARS)
+        )
+        sentence_starts = [start for start, _ in sentences]
+
+        # Map every keyword occurrence to its sentence in one pass over the body
+        keyword_hits: Dict[str, List[int]] = {}
+        for keyword, start in self.keyword_matcher.find_all(email_body):
+            i = bisect_right(sentence_starts, start) - 1
+            if i < 0 or start + len(keyword) > sentences[i][1]:
+                continue  # Match falls between sentences or spans a boundary
+            hits = keyword_hits.setdefault(keyword, [])
+            if not hits or hits[-1] != i:
+                hits.append(i)
+        if not keyword_hits:
+            return total_score
+
+        # Embed every candidate sentence once, in one batch, and reuse the vectors for all keywords
+        candidate_indices = sorted({i for hits in keyword_hits.values() for i in hits})
+        candidate_rows = {sentence_index: row + 1 for row, sentence_index in enumerate(candidate_indices)}
+        encoded = [encoding is not None and encoding.covers(*sentences[i]) for i in candidate_indices]
+        id_rows = [encoding.span(*sentences[i]) for i, is_encoded in zip(candidate_indices, encoded) if is_encoded]
+        texts = [email_body[slice(*sentences[i])] for i, is_encoded in zip(candidate_indices, encoded) if not is_encoded]
+        id_embeddings = iter(self.infer_ids(id_rows).embeddings if id_rows else [])
+        text_embeddings = iter(self.get_embeddings(texts) if texts else [])
+        candidate_embeddings = np.stack([next(id_embeddings if is_encoded else text_embeddings) for is_encoded in encoded])
+        if email_embedding is None:
+            if encoding is not None:
+                email_embedding = self.infer_ids([encoding.input_ids]).embeddings[0]
+            else:
+                email_embedding = self.get_embedding(email_body)
 
-        for keyword, keyword_embedding in self.keyword_embeddings.items():
-            keyword_present = False
-            for sentence in sentences:
-                if keyword.lower() in sentence.lower():
-                    sentence_embedding = self.get_embedding(sentence)
-                    similarity = cosine_similarity([keyword_embedding], [sentence_embedding])[0][0]
-                    total_score += similarity
-                    keyword_present = True
+        # Row 0 holds body x keyword similarities, the remaining rows sentence x keyword similarities
+        similarities = normalize_rows(np.vstack([email_embedding, candidate_embeddings])) @ self.keyword_matrix.T
 
-            if keyword_present:
-                # Add similarity between keyword and overall email body
-                overall_similarity = cosine_similarity([keyword_embedding], [email_embedding])[0][0]
-                total_score += overall_similarity
+        rows, columns, body_columns = [], [], []
+        for keyword, hits in keyword_hits.items():
+            column = self.keyword_index[keyword]
+            for i in hits:
+                rows.append(candidate_rows[i])
+                columns.append(column)
+            # Add similarity between keyword and overall email body
+            body_columns.append(column)
+        total_score += float(similarities[rows, columns].sum() + similarities[0, body_columns].sum())
 
         return total_score
 
     def get_sentiment(self, text: str) -> Tuple[float, str]:
         """Gets the sentiment score and label for a given text"""
-        if self.sentiment_classifier:
+        sentiment_score, sentiment_label, _ = self.analyze(text)
+        return sentiment_score, sentiment_label
+
+    @pinned
+    def analyze(self, text: str, encoding: Optional[TextEncoding] = None) -> Tuple[float, str, Optional[np.ndarray]]:
+        """
+        Gets the sentiment score, label and embedding for a text from one backbone pass.
+        Pass the text's encoding to run its token ids rather than tokenizing it again
+        """
+        if self.backbone:
             try:
-                result = self.sentiment_classifier(text)[0]
-                return result['score'], result['label']
+                if self.config.get("chunked_sentiment", {}).get("enabled", False):
+                    return self._analyze_windows(text, encoding)
+                result = self.infer_ids([encoding.input_ids]) if encoding is not None else self.infer([text])
+                sentiment_score, sentiment_label = self.backbone.sentiment(result.logits[0])
+                return sentiment_score, sentiment_label, result.embeddings[0]
             except Exception as e:
                 logger.error(f"Error during sentiment analysis: {e}")
-        return 0.0, "NEUTRAL"
+        return 0.0, "NEUTRAL", None
+
+    def _analyze_windows(self, text: str, encoding: Optional[TextEncoding] = None) -> Tuple[float, str, np.ndarray]:
+        """
+        Scores a long text as overlapping token windows run in one batch, so content past the
+        first 512 tokens still counts. The embedding is the mean of the window embeddings
+        """
+        chunk_config = self.config.get("chunked_sentiment", {})
+        window_tokens = chunk_config.get("window_tokens", 512)
+        overlap_tokens = chunk_config.get("overlap_tokens", 64)
+        max_tokens = chunk_config.get("max_tokens_per_email", 4096)
+
+        key = None
+        cached = None
+        if self.embedding_cache:
+            variant = f"{self.model_id}#windows-{window_tokens}-{overlap_tokens}-{max_tokens}"
+            key = EmbeddingCache.make_key(text, variant)
+            cached = self.embedding_cache.get(key)
+        if cached is None:
+            if encoding is None:
+                # Only the head of the text that can fit in the token budget needs tokenizing
+                encoding = self.backbone.encode(text[:max_tokens * MAX_CHARS_PER_TOKEN])
+            result = self.backbone.run_windows(encoding, window_tokens, overlap_tokens, max_tokens)
+            cached = (result.logits, result.embeddings.mean(axis=0))
+            if key:
+                self.embedding_cache.put(key, cached)
+
+        window_logits, embedding = cached
+        sentiment_score, sentiment_label = self.backbone.aggregate_sentiment(
+            window_logits, chunk_config.get("aggregation", "max")
+        )
+        return sentiment_score, sentiment_label, embedding
 
+    @pinned
     def is_complaint(self, email_body: str = None, email_subject: str = None) -> bool:
         """Checks if an email is a potential complaint based on sentiment and contextual analysis"""
         if not email_body or not email_subject:
@@ -143,46 +489,165 @@ class ComplaintProcessor:
 
         cleaned_body = clean_email(email_body)
         cleaned_subject = clean_email(email_subject)  # Consider if you need to use subject in this logic
+        cleaned_body = self.strip_quoted_content(cleaned_body)
 
-        sentiment_score, sentiment_label = self.get_sentiment(cleaned_body)
-        contextual_score = self.get_contextual_score(cleaned_body) if self.config.contextual_check.use_contextual_check else 0.0
+        cache_key = None
+        if self.verdict_cache:
+            cache_key = VerdictCache.make_key(cleaned_subject, cleaned_body, self.verdict_version())
+            cached_verdict = self.verdict_cache.get(cache_key)
+            if cached_verdict is not None:
+                logger.debug(f"Verdict cache hit: {cached_verdict}")
+                return cached_verdict
+
+        verdict, complete = self._classify(cleaned_body, cleaned_subject)
+        if cache_key and complete:
+            self.verdict_cache.put(cache_key, verdict)
+        return verdict
+
+    def strip_quoted_content(self, cleaned_body: str) -> str:
+        """Drops quoted reply history and signatures so inference only sees the sender's new text"""
+        stripping_config = self.config.get("reply_stripping", {})
+        if not stripping_config.get("enabled", False):
+            return cleaned_body
+        stripped_body, removed = strip_quoted_text(
+            cleaned_body,
+            stripping_config.get("strip_signatures", True),
+            stripping_config.get("signature_max_chars", 400),
+        )
+        if removed:
+            logger.debug(f"Stripped {removed} of {len(cleaned_body)} characters of quoted text and signatures")
+        return stripped_body
+
+    def _classify(self, cleaned_body: str, cleaned_subject: str) -> Tuple[bool, bool]:
+        """
+        Runs sentiment and contextual analysis on a cleaned email.
+        Returns the verdict and whether the model ran cleanly, so verdicts from failed inference are not cached
+        """
+        if self.config.get("cascade", {}).get("enabled", False):
+            return self._classify_cascade(cleaned_body, cleaned_subject)
+
+        contextual_config = self.config.get("contextual_check", {})
+        encoding = self.encode_email(cleaned_body)
+        sentiment_score, sentiment_label, body_embedding = self.analyze(cleaned_body, encoding)
+        complete = body_embedding is not None
+        contextual_score = self.get_contextual_score(cleaned_body, body_embedding, encoding) if contextual_config.get("use_contextual_check", True) else 0.0
 
         # Determine if complaint based on sentiment and contextual score
-        if (sentiment_label == "NEGATIVE" and sentiment_score >= self.config.sentiment_threshold) or \
-           (contextual_score >= self.config.contextual_check.contextual_score_threshold):
-            return True
+        if (sentiment_label == "NEGATIVE" and sentiment_score >= self.config.get("sentiment_threshold", 0.7)) or \
+           (contextual_score >= contextual_config.get("contextual_score_threshold", 0.4)):
+            return True, complete
 
         # Fallback: Simple keyword check if enabled
-        if self.config.fallback:
-            if any(keyword.lower() in cleaned_body.lower() for keyword in self.complaint_keywords):
-                return True
+        if self.config.get("fallback", False):
+            if self.keyword_matcher.contains_any(cleaned_body):
+                return True, complete
+
+        return False, complete
+
+    def _classify_cascade(self, cleaned_body: str, cleaned_subject: str) -> Tuple[bool, bool]:
+        """
+        Classifies in stages, cheapest first, stopping as soon as a stage is decisive:
+        lexical keyword score, then sentiment, then contextual similarity
+        """
+        cascade_config = self.config.get("cascade", {})
+        contextual_config = self.config.get("contextual_check", {})
+
+        # Stage 0: keyword score. The keyword fallback would flag any hit anyway, so it is settled here too
+        score = lexical_score(self.keyword_matcher, cleaned_body, cleaned_subject, cascade_config.get("subject_weight", 2.0))
+        if score >= cascade_config.get("accept_at", 3) or (score > 0 and self.config.get("fallback", False)):
+            self.cascade_stats.record("lexical", "complaint")
+            return True, True
+        if score < cascade_config.get("reject_below", 1):
+            self.cascade_stats.record("lexical", "not_complaint")
+            return False, True
+        self.cascade_stats.record("lexical", "passed")
 
-        return False
+        # Stage 1: sentiment. The body is tokenized once here and the encoding reused by stage 2
+        encoding = self.encode_email(cleaned_body)
+        sentiment_score, sentiment_label, body_embedding = self.analyze(cleaned_body, encoding)
+        complete = body_embedding is not None
+        if sentiment_label == "NEGATIVE" and sentiment_score >= self.config.get("sentiment_threshold", 0.7):
+            self.cascade_stats.record("sentiment", "complaint")
+            return True, complete
+        if not contextual_config.get("use_contextual_check", True):
+            self.cascade_stats.record("sentiment", "not_complaint")
+            return False, complete
+        self.cascade_stats.record("sentiment", "passed")
+
+        # Stage 2: contextual keyword similarity
+        verdict = self.get_contextual_score(cleaned_body, body_embedding, encoding) >= contextual_config.get("contextual_score_threshold", 0.4)
+        self.cascade_stats.record("contextual", "complaint" if verdict else "not_complaint")
+        return verdict, complete
+
+    def verdict_version(self) -> str:
+        """Hashes the model and every setting that can change a verdict, so cached verdicts expire when they change"""
+        contextual_config = self.config.get("contextual_check", {})
+        chunk_config = self.config.get("chunked_sentiment", {})
+        stripping_config = self.config.get("reply_stripping", {})
+        cascade_config = self.config.get("cascade", {})
+        settings = {
+            "model": self.model_id,
+            "keywords": self._active_bundle().keywords_digest,
+            "sentiment_threshold": self.config.get("sentiment_threshold", 0.7),
+            "contextual_check": [
+                contextual_config.get(key) for key in ("use_contextual_check", "contextual_score_threshold", "max_sentence_chars")
+            ],
+            "fallback": self.config.get("fallback"),
+            "chunked_sentiment": [
+                chunk_config.get(key)
+                for key in ("enabled", "window_tokens", "overlap_tokens", "aggregation", "max_tokens_per_email")
+            ],
+            "reply_stripping": [
+                stripping_config.get(key) for key in ("enabled", "strip_signatures", "signature_max_chars")
+            ],
+            "cascade": [cascade_config.get(key) for key in ("enabled", "subject_weight", "accept_at", "reject_below")],
+        }
+        return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get_exclusion_matcher(self) -> ExclusionMatcher:
+        """Returns the exclusion matcher, recompiling it only when the configured exclusions change"""
+        exclusions = self.config.get("exclusions", {})
+        source = (tuple(exclusions.get("from", [])), tuple(exclusions.get("subject", [])))
+        matcher = self._exclusion_matcher
+        if matcher is None or source != self._exclusion_source:
+            matcher = ExclusionMatcher(*source)
+            self._exclusion_matcher, self._exclusion_source = matcher, source
+        return matcher
 
     def process_email(self, message: Dict[str, Any], access_token: str, user_id: str) -> None:
         """Processes an email message for Sentiment Analysis and Complaint Detection"""
+        if "@removed" in message:
+            logger.debug(f"Skipping removed message {message.get('id')}")  # Delta queries report deletions without a body
+            return
         subject: str = message.get("subject", "No Subject")
         sender: str = message.get("from", {}).get("emailAddress", {}).get("address", "No Sender")
-        body_content: str = message["body"]["content"]
-        message_id = message.get('id')
 
-        header = f"X-Complaint-Processor: Processed-v1.0; ID={message_id};"
-        message["body"]["content"] = header + message["body"]["content"]
-
-        if any(re.match(value, sender) for value in self.config.exclusions.get('from', [])):
+        # Exclusions only need the headers, so they run before any body handling
+        exclusion_matcher = self.get_exclusion_matcher()
+        if exclusion_matcher.is_excluded_sender(sender):
             logger.info(f"Excluded sender: {sender}")
             return
-        if any(re.match(value, subject) for value in self.config.exclusions.get('subject', [])):
+        if exclusion_matcher.is_excluded_subject(subject):
             logger.info(f"Excluded subject: {subject}")
             return
 
+        body_content: str = message["body"]["content"]
+        message_id = message.get('id')
+
+        header = f"X-Complaint-Processor: Processed-v1.0; ID={message_id};"
+        message["body"]["content"] = header + message["body"]["content"]
+
         if self.is_complaint(body_content, subject):
             logger.info(f"Complaint detected: Subject: {subject}, From: {sender}, Message ID: {message_id}")
+            if self.config.get("graph_batching", {}).get("enabled", True):
+                # Sent with the rest of this poll's complaints when the mail loop flushes
+                self.email_client.queue_forward(user_id, message, self.config.get("delete_original", True), header)
+                return
             try:
-                self.email_client.send_message_to_distribution_list(access_token, user_id, message_id)
+                self.email_client.send_message_to_distribution_list(access_token, user_id, message_id, header)
                 logger.info("Complaint forwarded to distribution list.")
 
-                if self.config.delete_original:
+                if self.config.get("delete_original", True):
                     try:
                         delete_url = f"https://graph.microsoft.com/v1.0/users/{user_id}/messages/{message_id}"
                         delete_headers = {"Authorization": f"Bearer {access_token}"}
@@ -71,6 +71,11 @@ class Config:
         except Exception as e:
             logger.exception(f"An unexpected error occurred loading configuration: {e}")
 
+    def update_config(self):
+        """Reloads the configuration if the file has changed since it was last loaded"""
+        if self._is_config_outdated():
+            self._load_config()
+
     def __getattr__(self, name):
         if name in self._config_data:
             value = self._config_data[name]
@@ -82,6 +87,12 @@ class Config:
 
     def __contains__(self, item):
         return item in self._config_data
+
+    def get(self, key, default=None):
+        """Returns a config value, or the default if the key is not set"""
+        if key in self._config_data:
+            return getattr(self, key)
+        return default
 class ConfigWrapper:
     def __init__(self, config_data):
         self._config_data = config_data
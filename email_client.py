@@ -1,13 +1,38 @@
 import requests
+import threading
+from dataclasses import dataclass
 from msal import ConfidentialClientApplication, SerializableTokenCache
 from typing import Optional, List, Dict, Any, Tuple
 from urllib.parse import quote, urlencode
 from datetime import datetime
 from .config_loader import Config
+from .graph_batch import GRAPH_BATCH_URL, execute_batch
+from .graph_session import create_graph_session
+from .retry_policy import RetryBudget, RetryPolicy, is_retryable_status, mailbox_of, parse_retry_after
+from .utils import parse_interval
 from loguru import logger
 import time
 import os
 
+@dataclass
+class PendingForward:
+    """A complaint waiting to be forwarded (and optionally deleted) in the next batch flush"""
+    user_id: str
+    message_id: str
+    message: Optional[Dict[str, Any]]  # The message as already fetched; re-fetched in the batch if it has no body
+    delete_original: bool
+    comment: Optional[str] = None  # Added above the original by native forwards
+
+
+@dataclass
+class ActionResult:
+    """Outcome of the batched actions for one message"""
+    message_id: str
+    forwarded: bool = False
+    deleted: bool = False
+    error: Optional[str] = None
+
+
 class EmailClient:
     """Client for interacting with Microsoft Graph API"""
 
@@ -19,6 +44,9 @@ class EmailClient:
         self.private_key = None
         self.private_key_path = config.private_key_path
         self._load_keys()
+        http_config = self.config.get("graph_http", {})
+        self.request_timeout = http_config.get("timeout", 30)
+        self.session = create_graph_session(http_config.get("pool_maxsize", 16))
         
         self.app = ConfidentialClientApplication(
             config.client_id,
@@ -27,18 +55,28 @@ class EmailClient:
             client_credential = {
                 "private_key": self.private_key,
                 "thumbprint": self.config.cert_thumbprint,
-                "public_certificate": cert_data
+                "public_certificate": self.cert_data
             },
-            token_cache=self.cache  # Pass the cache to the app
+            token_cache=self.cache,  # Pass the cache to the app
+            http_client=self.session  # Token requests reuse the pooled connections too
         )
         self.distribution_list_email = self.config.distribution_list_email
         self.scopes = self.config.scopes
         self.max_retries = self.config.max_retries
         self.retry_delay = self.config.retry_delay
-        self._load_cache()
+        retry_config = self.config.get("retry_policy", {})
+        self.retry_policy = RetryPolicy(
+            self.max_retries,
+            self.retry_delay,
+            retry_config.get("max_delay", 60),
+            RetryBudget(retry_config.get("budget_per_mailbox", 20), parse_interval(retry_config.get("budget_window", "1m"))),
+        )
         self.token_cache = self.config.delta_token_file
+        self._load_cache()
+        self._pending_forwards: Dict[Tuple[str, str], PendingForward] = {}  # By (user_id, message_id), in queue order
+        self._pending_lock = threading.Lock()
 
-def _load_keys(self):
+    def _load_keys(self):
         """Loads the cert and private key from file"""
         try:
             if os.path.exists(self.config.cert_path):
@@ -72,25 +110,39 @@ def _load_keys(self):
         except Exception as e:
             logger.error(f"Failed to save token cache: {e}")
 
-    def _make_graph_api_request(self, url, headers, method="GET", json_data=None) -> requests.Response:
-        """Helper function to make Graph API requests with retries"""
-        for attempt in range(self.max_retries):
+    def close(self):
+        """Closes the pooled Graph API connections"""
+        self.session.close()
+
+    def _make_graph_api_request(self, url, headers, method="GET", json_data=None, params=None) -> requests.Response:
+        """
+        Helper function to make Graph API requests over the shared pooled session. Connection errors, timeouts,
+        throttling and transient server errors are retried as the retry policy allows; other errors are raised at once
+        """
+        if method not in ("GET", "POST", "DELETE"):
+            raise ValueError(f"Invalid HTTP method: {method}")
+        mailbox = mailbox_of(url)
+        for attempt in range(self.retry_policy.max_attempts):
             try:
-                if method == "GET":
-                    response = requests.get(url, headers=headers)
-                elif method == "POST":
-                    response = requests.post(url, headers=headers, json=json_data)
-                else:
-                    raise ValueError(f"Invalid HTTP method: {method}")
+                response = self.session.request(
+                    method, url, headers=headers, json=json_data, params=params, timeout=self.request_timeout
+                )
                 response.raise_for_status() 
                 return response
             except requests.exceptions.RequestException as e:
-                if attempt < self.max_retries - 1:
+                if e.response is not None:
+                    retryable = is_retryable_status(e.response.status_code)
+                    retry_after = parse_retry_after(e.response.headers.get("Retry-After"))
+                else:
+                    retryable = isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+                    retry_after = None
+                if retryable and self.retry_policy.should_retry(attempt, mailbox):
+                    delay = self.retry_policy.backoff(attempt, retry_after)
                     logger.warning(
-                        f"Graph API request failed (attempt {attempt + 1}/{self.max_retries}): {e}. Retrying in {self.retry_delay} seconds...")
-                    time.sleep(self.retry_delay)
+                        f"Graph API request failed (attempt {attempt + 1}/{self.retry_policy.max_attempts}): {e}. Retrying in {delay:.1f} seconds...")
+                    time.sleep(delay)
                 else:
-                    logger.error(f"Graph API request failed after {self.max_retries} attempts: {e}")
+                    logger.error(f"Graph API request failed after {attempt + 1} attempts: {e}")
                     raise
             except Exception as e:
                 logger.exception(f"Unexpected error making Graph API Request: {e}")
@@ -135,12 +187,11 @@ def _load_keys(self):
 
         return " and ".join(filter_parts) if filter_parts else ""
 
-    def get_emails(self, access_token: str, mailbox_address: str, delta_token: Optional[str] = None,
-                   email_filter: Optional[Dict] = None) -> Tuple[List[dict], Optional[str]]:
-        """Retrieves emails from a specified mailbox using delta queries with optional filtering"""
+    def _build_messages_url(self, mailbox_address: str, delta_token: Optional[str] = None,
+                            email_filter: Optional[Dict] = None) -> str:
+        """Builds the URL of the first page of a mailbox's messages, as a delta query when a delta token is given"""
         url = f"https://graph.microsoft.com/v1.0/users/{mailbox_address}/messages"
         query_params = {}
-        headers = {"Authorization": f"Bearer {access_token}"}
 
         if delta_token:
             query_params["$deltaToken"] = quote(delta_token)
@@ -152,7 +203,13 @@ def _load_keys(self):
             if filter_query:
                 query_params["$filter"] = filter_query
 
-        url += "?" + urlencode(query_params)
+        return url + "?" + urlencode(query_params)
+
+    def get_emails(self, access_token: str, mailbox_address: str, delta_token: Optional[str] = None,
+                   email_filter: Optional[Dict] = None) -> Tuple[List[dict], Optional[str]]:
+        """Retrieves emails from a specified mailbox using delta queries with optional filtering"""
+        url = self._build_messages_url(mailbox_address, delta_token, email_filter)
+        headers = {"Authorization": f"Bearer {access_token}"}
 
         try:
             response = self._make_graph_api_request(url, headers)
@@ -188,7 +245,30 @@ def _load_keys(self):
             "saveToSentItems": False
         }
 
-    def send_message_to_distribution_list(self, access_token: str, user_id: str, message_id: str):
+    def _create_native_forward_payload(self, comment: Optional[str] = None) -> Dict[str, Any]:
+        """Creates the payload for Graph's server-side /forward, which sends the message without downloading it"""
+        payload: Dict[str, Any] = {"toRecipients": [{"emailAddress": {"address": self.distribution_list_email}}]}
+        if comment:
+            payload["comment"] = comment
+        return payload
+
+    def send_message_to_distribution_list(self, access_token: str, user_id: str, message_id: str, comment: Optional[str] = None):
+        """
+        Forwards the specified message to the distribution list. In native forward mode Graph forwards it
+        server-side, with comment above the original; if that fails, or in copy mode, a copy is sent instead
+        """
+        if self.config.get("forward_mode", "native") == "native":
+            try:
+                forward_url = f"https://graph.microsoft.com/v1.0/users/{user_id}/messages/{message_id}/forward"
+                headers = {"Authorization": f"Bearer {access_token}", "Content-Type": "application/json"}
+                self._make_graph_api_request(forward_url, headers, method="POST", json_data=self._create_native_forward_payload(comment))
+                logger.info(f"Message {message_id} forwarded to distribution list.")
+                return
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"Native forward of message {message_id} failed: {e}. Falling back to sending a copy.")
+        self._send_copy_to_distribution_list(access_token, user_id, message_id)
+
+    def _send_copy_to_distribution_list(self, access_token: str, user_id: str, message_id: str):
         """Sends a copy of the specified message to the distribution list"""
         try:
             get_message_url = f"https://graph.microsoft.com/v1.0/users/{user_id}/messages/{message_id}"
@@ -208,3 +288,117 @@ def _load_keys(self):
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Error forwarding message: {e}")
+
+    def queue_forward(self, user_id: str, message: Dict[str, Any], delete_original: bool, comment: Optional[str] = None):
+        """Queues a complaint to be forwarded, and its original deleted, by the next flush_actions call"""
+        with self._pending_lock:
+            key = (user_id, message["id"])
+            if key in self._pending_forwards:
+                logger.debug(f"Message {message['id']} is already queued for forwarding.")
+                return
+            self._pending_forwards[key] = PendingForward(user_id, message["id"], message, delete_original, comment)
+
+    def flush_actions(self, access_token: str) -> Dict[str, ActionResult]:
+        """
+        Forwards and deletes every queued complaint through Graph $batch calls of up to 20 requests.
+        Each delete depends on its message's forward, so originals are only removed once forwarded.
+        In native forward mode, messages Graph could not forward server-side are sent as copies instead.
+        Returns the outcome for each message
+        """
+        with self._pending_lock:
+            pending, self._pending_forwards = list(self._pending_forwards.values()), {}
+        results = {forward.message_id: ActionResult(forward.message_id) for forward in pending}
+        if not pending:
+            return results
+
+        headers = {"Authorization": f"Bearer {access_token}", "Content-Type": "application/json"}
+
+        def post(batch: Dict[str, Any]) -> Dict[str, Any]:
+            return self._make_graph_api_request(GRAPH_BATCH_URL, headers, method="POST", json_data=batch).json()
+
+        indices = list(range(len(pending)))
+        if self.config.get("forward_mode", "native") == "native":
+            indices = self._batch_forward(post, pending, indices, results, native=True)
+            if indices:
+                logger.warning(f"Native forward failed for {len(indices)} messages. Falling back to sending copies.")
+                for i in indices:
+                    results[pending[i].message_id].error = None
+        if indices:
+            indices = self._fetch_missing_messages(post, pending, indices, results)
+            self._batch_forward(post, pending, indices, results, native=False)
+
+        forwarded = sum(result.forwarded for result in results.values())
+        deleted = sum(result.deleted for result in results.values())
+        logger.info(f"Batch flush: {forwarded}/{len(pending)} complaints forwarded, {deleted} originals deleted.")
+        for result in results.values():
+            if result.error:
+                logger.error(f"Batched actions for message {result.message_id} failed: {result.error}")
+        return results
+
+    def _fetch_missing_messages(self, post, pending: List[PendingForward], indices: List[int],
+                                results: Dict[str, ActionResult]) -> List[int]:
+        """
+        Fetches, in batches, the queued messages that were not queued with a body, for sending as copies.
+        Returns the indices that are ready to send
+        """
+        fetches = [
+            {"id": f"{i}-get", "method": "GET", "url": f"/users/{pending[i].user_id}/messages/{pending[i].message_id}"}
+            for i in indices
+            if not (pending[i].message and pending[i].message.get("body"))
+        ]
+        for request_id, response in execute_batch(post, fetches, self.retry_policy).items():
+            forward = pending[int(request_id.split("-")[0])]
+            if 200 <= response.get("status", 0) < 300:
+                forward.message = response.get("body")
+            else:
+                results[forward.message_id].error = f"fetch failed with status {response.get('status')}"
+        return [i for i in indices if not results[pending[i].message_id].error]
+
+    def _batch_forward(self, post, pending: List[PendingForward], indices: List[int],
+                       results: Dict[str, ActionResult], native: bool) -> List[int]:
+        """
+        Forwards the given queued messages, natively or as copies, deleting each original after its forward.
+        Returns the indices whose forward failed
+        """
+        actions = []
+        for i in indices:
+            forward = pending[i]
+            if native:
+                actions.append({
+                    "id": f"{i}-forward",
+                    "method": "POST",
+                    "url": f"/users/{forward.user_id}/messages/{forward.message_id}/forward",
+                    "headers": {"Content-Type": "application/json"},
+                    "body": self._create_native_forward_payload(forward.comment),
+                })
+            else:
+                actions.append({
+                    "id": f"{i}-forward",
+                    "method": "POST",
+                    "url": f"/users/{forward.user_id}/sendMail",
+                    "headers": {"Content-Type": "application/json"},
+                    "body": self._create_forward_message_payload(forward.message),
+                })
+            if forward.delete_original:
+                actions.append({
+                    "id": f"{i}-delete",
+                    "method": "DELETE",
+                    "url": f"/users/{forward.user_id}/messages/{forward.message_id}",
+                    "dependsOn": [f"{i}-forward"],
+                })
+
+        failed = []
+        for request_id, response in execute_batch(post, actions, self.retry_policy).items():
+            index, action = request_id.split("-")
+            result = results[pending[int(index)].message_id]
+            if 200 <= response.get("status", 0) < 300:
+                if action == "forward":
+                    result.forwarded = True
+                else:
+                    result.deleted = True
+            else:
+                if action == "forward":
+                    failed.append(int(index))
+                if action == "forward" or not result.error:  # A failed forward explains its skipped delete
+                    result.error = f"{action} failed with status {response.get('status')}"
+        return sorted(failed)
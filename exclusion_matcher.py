@@ -0,0 +1,89 @@
+import fnmatch
+import re
+from typing import Iterable, List, Optional, Pattern
+
+from loguru import logger
+
+# Entries with this prefix are shell-style globs; every other entry is a regular expression
+GLOB_PREFIX = "glob:"
+# "no-reply@*": a sender glob for a literal local part at any domain, the one unprefixed glob shape
+SENDER_GLOB_PATTERN = re.compile(r"^[\w.+-]+@\*$")
+# "@example.com" or "*@example.com": an exact sender domain
+DOMAIN_ENTRY_PATTERN = re.compile(r"^\*?@([^*?\[\]\\]+)$")
+# Flags of a pattern without inline flags, to spot entries that set global ones such as (?i)
+DEFAULT_FLAGS = re.compile("").flags
+
+
+def as_glob(entry: str) -> Optional[str]:
+    """
+    Returns the glob an exclusion entry spells, or None if it is a regular expression.
+    Only unambiguous entries are globs: a "glob:" prefix or the no-reply@* shape, so regexes such as
+    "Re: ?Out of Office" keep their re.match meaning
+    """
+    if entry.startswith(GLOB_PREFIX):
+        return entry[len(GLOB_PREFIX):]
+    if SENDER_GLOB_PATTERN.match(entry):
+        return entry
+    return None
+
+
+def compile_patterns(entries: Iterable[str]) -> List[Pattern]:
+    """
+    Compiles exclusion entries, joining those that can share one anchored alternation.
+    Globs ("glob:" entries and the no-reply@* shape) match the whole value case-insensitively;
+    regular expressions keep re.match prefix semantics.
+    Entries with capturing groups or global inline flags such as (?i) would change meaning inside an
+    alternation (shifted backreferences, clashing group names, flags applied to every entry), so they
+    are kept as separately compiled patterns
+    """
+    alternatives: List[str] = []
+    separate: List[Pattern] = []
+    for entry in entries:
+        glob = as_glob(entry)
+        if glob is not None:
+            logger.debug(f"Exclusion entry '{entry}' is matched as a glob")
+            alternatives.append(f"(?i:{fnmatch.translate(glob)})")
+            continue
+        logger.debug(f"Exclusion entry '{entry}' is matched as a regular expression")
+        try:
+            compiled = re.compile(entry)
+        except re.error as e:
+            logger.error(f"Ignoring invalid exclusion pattern '{entry}': {e}")
+            continue
+        if compiled.groups == 0 and compiled.flags == DEFAULT_FLAGS:
+            alternatives.append(f"(?:{entry})")
+        else:
+            separate.append(compiled)
+    if not alternatives:
+        return separate
+    try:
+        return [re.compile("|".join(alternatives))] + separate
+    except re.error as e:
+        logger.warning(f"Exclusion patterns could not be combined, matching them one by one: {e}")
+        return [re.compile(alternative) for alternative in alternatives] + separate
+
+
+class ExclusionMatcher:
+    """Sender and subject exclusions compiled once per config version"""
+
+    def __init__(self, from_entries: Iterable[str], subject_entries: Iterable[str]):
+        self.sender_domains = set()
+        sender_patterns = []
+        for entry in from_entries:
+            domain = DOMAIN_ENTRY_PATTERN.match(entry)
+            if domain:
+                self.sender_domains.add(domain.group(1).casefold())
+            else:
+                sender_patterns.append(entry)
+        self._sender_patterns = compile_patterns(sender_patterns)
+        self._subject_patterns = compile_patterns(subject_entries)
+
+    def is_excluded_sender(self, sender: str) -> bool:
+        """Checks the sender against the exact-domain set, then the compiled patterns"""
+        if self.sender_domains and sender.rpartition("@")[2].casefold() in self.sender_domains:
+            return True
+        return any(pattern.match(sender) for pattern in self._sender_patterns)
+
+    def is_excluded_subject(self, subject: str) -> bool:
+        """Checks the subject against the compiled patterns"""
+        return any(pattern.match(subject) for pattern in self._subject_patterns)
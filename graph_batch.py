@@ -0,0 +1,117 @@
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+from loguru import logger
+
+from .retry_policy import RetryPolicy, is_retryable_status, mailbox_of, parse_retry_after
+
+GRAPH_BATCH_URL = "https://graph.microsoft.com/v1.0/$batch"
+MAX_BATCH_REQUESTS = 20  # Graph's limit on sub-requests per $batch call
+FAILED_DEPENDENCY = 424
+
+
+def group_requests(sub_requests: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    Groups sub-requests with the requests they depend on, since Graph only honours dependsOn
+    between requests in the same $batch call. Groups keep the order of their first request
+    """
+    group_of: Dict[str, int] = {}
+    groups: List[List[Dict[str, Any]]] = []
+    for sub_request in sub_requests:
+        dependency_groups = {group_of[dependency] for dependency in sub_request.get("dependsOn", []) if dependency in group_of}
+        if dependency_groups:
+            target = min(dependency_groups)
+            for index in sorted(dependency_groups - {target}):
+                for merged in groups[index]:
+                    group_of[merged["id"]] = target
+                groups[target].extend(groups[index])
+                groups[index] = []
+        else:
+            target = len(groups)
+            groups.append([])
+        groups[target].append(sub_request)
+        group_of[sub_request["id"]] = target
+    return [group for group in groups if group]
+
+
+def pack_batches(groups: List[List[Dict[str, Any]]], max_requests: int = MAX_BATCH_REQUESTS) -> List[List[Dict[str, Any]]]:
+    """Packs dependency groups, in order, into batches of at most max_requests sub-requests"""
+    batches: List[List[Dict[str, Any]]] = []
+    for group in groups:
+        if len(group) > max_requests:
+            raise ValueError(f"A dependsOn chain of {len(group)} requests does not fit in one $batch call")
+        if not batches or len(batches[-1]) + len(group) > max_requests:
+            batches.append([])
+        batches[-1].extend(group)
+    return batches
+
+
+def retry_after_seconds(response: Dict[str, Any]) -> Optional[float]:
+    """Returns a sub-response's Retry-After delay in seconds, if it has one"""
+    for name, value in (response.get("headers") or {}).items():
+        if name.lower() == "retry-after":
+            return parse_retry_after(value)
+    return None
+
+
+def execute_batch(post: Callable[[Dict[str, Any]], Dict[str, Any]], sub_requests: List[Dict[str, Any]],
+                  policy: Optional[RetryPolicy] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Sends sub-requests as Graph $batch calls and returns the final response of each, by request id.
+    Sub-requests that fail with a retryable status are sent again, with any of their dependents
+    that were skipped, as the retry policy and their mailbox's retry budget allow: after the longest
+    Retry-After the service asked for, or a jittered backoff. A $batch call that fails outright
+    marks its sub-requests with status 0 and the error
+    """
+    policy = policy or RetryPolicy()
+    results: Dict[str, Dict[str, Any]] = {}
+    pending = sub_requests
+    for attempt in range(policy.max_attempts):
+        for batch in pack_batches(group_requests(pending)):
+            try:
+                response = post({"requests": batch})
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Graph $batch call of {len(batch)} requests failed: {e}")
+                for sub_request in batch:
+                    results[sub_request["id"]] = {"id": sub_request["id"], "status": 0, "body": {"error": str(e)}}
+                continue
+            for sub_response in response.get("responses", []):
+                results[str(sub_response.get("id"))] = sub_response
+
+        retryable = [
+            sub_request for sub_request in pending
+            if is_retryable_status(results.get(sub_request["id"], {}).get("status"))
+        ]
+        retry_ids = {
+            sub_request["id"] for sub_request in retryable
+            if policy.should_retry(attempt, mailbox_of(sub_request["url"]))
+        }
+        if len(retry_ids) < len(retryable) and attempt < policy.max_attempts - 1:
+            logger.warning(f"{len(retryable) - len(retry_ids)} Graph $batch sub-requests are out of retry budget")
+        # Dependents skipped because a retryable request failed go again with it
+        for sub_request in pending:
+            if results.get(sub_request["id"], {}).get("status") == FAILED_DEPENDENCY and \
+                    retry_ids.intersection(sub_request.get("dependsOn", [])):
+                retry_ids.add(sub_request["id"])
+        if not retry_ids:
+            break
+
+        delays = [retry_after_seconds(results[request_id]) for request_id in retry_ids]
+        delay = policy.backoff(attempt, max([d for d in delays if d is not None], default=None))
+        logger.warning(
+            f"Retrying {len(retry_ids)} Graph $batch sub-requests in {delay:.1f} seconds "
+            f"(attempt {attempt + 1}/{policy.max_attempts})"
+        )
+        time.sleep(delay)
+        pending = [_retry_copy(sub_request, retry_ids) for sub_request in pending if sub_request["id"] in retry_ids]
+    return results
+
+
+def _retry_copy(sub_request: Dict[str, Any], retry_ids: set) -> Dict[str, Any]:
+    """Copies a sub-request for the next round, dropping dependencies that already succeeded"""
+    retry = dict(sub_request)
+    depends_on = [dependency for dependency in retry.pop("dependsOn", []) if dependency in retry_ids]
+    if depends_on:
+        retry["dependsOn"] = depends_on
+    return retry
@@ -0,0 +1,22 @@
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from loguru import logger
+
+
+def create_graph_session(pool_maxsize: int = 16, pool_connections: int = 4) -> requests.Session:
+    """
+    Builds the session every Graph API call goes through, so TCP and TLS connections to
+    graph.microsoft.com are kept alive and reused across requests and threads.
+    The pool blocks rather than opening throwaway connections when all pool_maxsize are busy,
+    and cookies are never stored, so concurrent requests share no mutable session state
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=True)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    logger.info(f"Graph API session created (pool_maxsize={pool_maxsize})")
+    return session
@@ -0,0 +1,132 @@
+import html
+import re
+from typing import Iterator, List
+
+# Elements whose content is never visible text
+SKIPPED_ELEMENTS = {"head", "script", "style"}
+
+# Elements rendered on lines of their own, so their tags become a line break that sentence segmentation can see
+BLOCK_ELEMENTS = {
+    "address", "article", "blockquote", "br", "dd", "div", "dl", "dt", "footer", "h1", "h2", "h3", "h4",
+    "h5", "h6", "header", "hr", "li", "ol", "p", "pre", "section", "table", "tr", "ul",
+}
+
+# Elements that separate words on the same line, so their tags become a space rather than nothing
+CELL_ELEMENTS = {"td", "th"}
+
+TAG_NAME_PATTERN = re.compile(r"/?([A-Za-z][A-Za-z0-9]*)")
+SKIPPED_END_PATTERNS = {name: re.compile(rf"</{name}\s*>", re.IGNORECASE) for name in SKIPPED_ELEMENTS}
+INLINE_BASE64_PATTERN = re.compile(r"data:[\w.+/-]+;base64,[A-Za-z0-9+/=]+")
+# The end of a tag, or the opening quote of an attribute value
+TAG_SCAN_PATTERN = re.compile(r"""=\s*["']|>""")
+LINE_BREAK_PATTERN = re.compile(r"[\n\r\v\f\x1c-\x1e\x85\u2028\u2029]")
+# Any start or end tag: a body with none is plain text, whose line breaks are meaningful
+HTML_TAG_PATTERN = re.compile(r"</?[A-Za-z][A-Za-z0-9]*(?:\s[^<>]*)?/?>")
+
+
+def _tag_end(markup: str, start: int) -> int:
+    """
+    Returns the index of the '>' closing the tag at start, skipping '>' inside quoted attribute values.
+    Scans left to right once, tracking the open quote, so apostrophes inside double-quoted values
+    (alt="Bob's photo") and vice versa are just text
+    """
+    position = start
+    while True:
+        token = TAG_SCAN_PATTERN.search(markup, position)
+        if token is None:
+            return -1
+        if token.group() == ">":
+            return token.start()
+        closing_quote = markup.find(token.group()[-1], token.end())
+        if closing_quote < 0:
+            return -1
+        position = closing_quote + 1
+
+
+def _as_html_text(fragment: str) -> str:
+    """Turns line breaks in an HTML text node into spaces, as a browser renders them"""
+    return LINE_BREAK_PATTERN.sub(" ", fragment)
+
+
+def iter_html_text(markup: str) -> Iterator[str]:
+    """
+    Yields the text fragments of an HTML document in a single forward pass.
+    Tags, comments and the contents of head, script and style elements are skipped;
+    block-level tags yield a line break and table cells a space, so words on either side stay apart.
+    Line breaks inside text nodes are only source wrapping, so they become spaces
+    """
+    position = 0
+    length = len(markup)
+    while position < length:
+        tag_start = markup.find("<", position)
+        if tag_start < 0:
+            yield _as_html_text(markup[position:])
+            return
+        if tag_start > position:
+            yield _as_html_text(markup[position:tag_start])
+
+        if markup.startswith("<!--", tag_start):
+            comment_end = markup.find("-->", tag_start + 4)
+            position = length if comment_end < 0 else comment_end + 3
+            continue
+
+        next_char = markup[tag_start + 1:tag_start + 2]
+        if not (next_char.isalpha() or next_char in ("/", "!", "?")):
+            yield "<"  # A literal '<' in text, not a tag
+            position = tag_start + 1
+            continue
+
+        tag_end = _tag_end(markup, tag_start + 1)
+        if tag_end < 0:
+            yield _as_html_text(markup[tag_start:])  # Unterminated tag: keep it as text, as the old regex did
+            return
+        position = tag_end + 1
+
+        name_match = TAG_NAME_PATTERN.match(markup, tag_start + 1, tag_end)
+        if not name_match:
+            continue
+        name = name_match.group(1).lower()
+        if name in SKIPPED_ELEMENTS and markup[tag_start + 1] != "/":
+            element_end = SKIPPED_END_PATTERNS[name].search(markup, position)
+            position = length if element_end is None else element_end.end()
+            yield " "
+        elif name in BLOCK_ELEMENTS:
+            yield "\n"
+        elif name in CELL_ELEMENTS:
+            yield " "
+
+
+def _join_separator(pending: str, whitespace: str) -> str:
+    """Returns the single separator owed between two words for the whitespace seen between them: a line break if any was seen"""
+    if LINE_BREAK_PATTERN.search(pending) or LINE_BREAK_PATTERN.search(whitespace):
+        return "\n"
+    return " " if pending or whitespace else ""
+
+
+def html_to_text(markup: str) -> str:
+    """
+    Extracts visible text from HTML with entities decoded, inline base64 data dropped, whitespace collapsed and case folded.
+    Line breaks are kept as single newlines: those from block-level tags and <br> in HTML, or every line break
+    in a plain-text body with no tags. Other whitespace becomes single spaces. Each fragment is decoded and
+    normalized as it is extracted, so the only full-size string built is the result
+    """
+    pieces: List[str] = []
+    pending = ""  # Whitespace seen since the last word, reduced to the separator owed before the next one
+    fragments = iter_html_text(markup) if HTML_TAG_PATTERN.search(markup) else [markup]
+    for fragment in fragments:
+        if "&" in fragment:
+            fragment = html.unescape(fragment)  # Entities never span tags, so fragments decode independently
+        if "base64," in fragment:
+            fragment = INLINE_BASE64_PATTERN.sub(" ", fragment)
+        lines = [" ".join(line.split()) for line in LINE_BREAK_PATTERN.split(fragment)]
+        text = "\n".join(line for line in lines if line)
+        if not text:
+            pending = _join_separator(pending, fragment)
+            continue
+        if pieces:
+            pending = _join_separator(pending, fragment[:len(fragment) - len(fragment.lstrip())])
+            if pending:
+                pieces.append(pending)
+        pieces.append(text.casefold())
+        pending = fragment[len(fragment.rstrip()):]
+    return "".join(pieces)
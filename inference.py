@@ -0,0 +1,283 @@
+import multiprocessing
+import os
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from loguru import logger
+
+# torch and transformers take seconds to import, so the backends that need them
+# (torch_backend, onnx_backend) are only imported when a backend is first created
+
+MAX_CHARS_PER_TOKEN = 16  # Upper bound used to avoid tokenizing text beyond the token budget
+MAX_WINDOWS_PER_TEXT = 64  # Windows run for one text at most; their stride widens to stay within it
+
+_clamped_overlaps = set()  # (window, overlap) pairs already warned about, so each is logged once
+
+
+@dataclass
+class InferenceResult:
+    """Outputs of a single forward pass over a batch of texts"""
+    logits: np.ndarray  # (batch, num_labels) classification logits
+    embeddings: np.ndarray  # (batch, hidden_size) mean-pooled last hidden state
+
+
+@dataclass
+class TextEncoding:
+    """A text tokenized once, without special tokens, with the character span of every token"""
+    input_ids: List[int]
+    offsets: List[Tuple[int, int]]
+    text_length: Optional[int] = None  # Characters encoded, when only the head of a longer text was
+    _starts: List[int] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._starts = [start for start, _ in self.offsets]
+
+    def span(self, start: int, end: int) -> List[int]:
+        """Returns the ids of the tokens that start within text[start:end], without re-tokenizing"""
+        return self.input_ids[bisect_left(self._starts, start):bisect_left(self._starts, end)]
+
+    def covers(self, start: int, end: int) -> bool:
+        """Checks if text[start:end] lies within the encoded part of the text"""
+        return self.text_length is None or end <= self.text_length
+
+
+class InferenceBackend(ABC):
+    """Serves sentiment logits and embeddings for batches of texts"""
+
+    model_name: str
+    model_id: str  # model, revision and engine variant; keys cached model outputs
+    id2label: Dict[int, str]
+    max_length: int  # longest sequence the model takes, special tokens included
+    special_tokens: int  # special tokens added around each sequence
+
+    @abstractmethod
+    def run(self, texts: List[str]) -> InferenceResult:
+        pass
+
+    @abstractmethod
+    def encode(self, text: str) -> TextEncoding:
+        """Tokenizes a text once, keeping token offsets so spans of it can be run without re-tokenizing"""
+        pass
+
+    @abstractmethod
+    def run_ids(self, rows: List[List[int]]) -> InferenceResult:
+        """Runs rows of token ids (without special tokens) as one padded batch, truncating each to fit the model"""
+        pass
+
+    def run_windows(self, encoding: TextEncoding, window_tokens: int, overlap_tokens: int, max_tokens: int) -> InferenceResult:
+        """
+        Runs the first max_tokens of an encoded text as a batch of overlapping token windows, one result row per window.
+        Overlap is clamped below the window and the stride widened past MAX_WINDOWS_PER_TEXT windows, so a
+        misconfigured overlap cannot turn one email into thousands of forward passes
+        """
+        window = min(window_tokens, self.max_length) - self.special_tokens
+        if overlap_tokens >= window:
+            if (window, overlap_tokens) not in _clamped_overlaps:
+                _clamped_overlaps.add((window, overlap_tokens))
+                logger.warning(f"overlap_tokens {overlap_tokens} is not below the {window}-token window; using {window - 1}")
+            overlap_tokens = window - 1
+        ids = encoding.input_ids[:max_tokens]
+        span = max(len(ids) - window, 0)
+        stride = max(window - overlap_tokens, -(-span // (MAX_WINDOWS_PER_TEXT - 1)))
+        starts = list(range(0, span + 1, stride))
+        if starts[-1] + window < len(ids):
+            starts.append(len(ids) - window)
+        return self.run_ids([ids[start:start + window] for start in starts])
+
+    def close(self):
+        """Releases resources held outside the Python heap, such as worker processes"""
+        pass
+
+    @staticmethod
+    def probabilities(logits: np.ndarray) -> np.ndarray:
+        """Converts a (batch, num_labels) logits matrix to class probabilities, as the sentiment-analysis pipeline does"""
+        if logits.shape[-1] == 1:
+            return 1.0 / (1.0 + np.exp(-logits))
+        exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+        return exp / exp.sum(axis=-1, keepdims=True)
+
+    def sentiment(self, logits: np.ndarray) -> Tuple[float, str]:
+        """Converts one row of logits to the top (score, label) pair"""
+        return self.aggregate_sentiment(logits[np.newaxis, :])
+
+    def aggregate_sentiment(self, logits: np.ndarray, aggregation: str = "mean") -> Tuple[float, str]:
+        """
+        Combines the logits of several windows into one (score, label) pair.
+        "mean" averages the class probabilities; "max" takes each class's highest probability
+        over the windows, so one strongly scored window decides the label
+        """
+        probabilities = self.probabilities(logits)
+        combined = probabilities.max(axis=0) if aggregation == "max" else probabilities.mean(axis=0)
+        best = int(combined.argmax())
+        return float(combined[best]), self.id2label[best]
+
+
+VERIFICATION_TEXTS = [
+    "i am very unhappy with the service and want a refund.",
+    "thanks for the quick reply, everything works now.",
+    "the package arrived damaged and nobody answers my calls",
+    "please send the invoice for last month",
+]
+
+
+def verify_backend(candidate: InferenceBackend, reference: InferenceBackend, texts: List[str], tolerance: float) -> bool:
+    """
+    Compares a backend against the reference on sample texts.
+    Passes if class probabilities differ by at most tolerance and embeddings keep a cosine similarity of at least 1 - tolerance
+    """
+    expected = reference.run(texts)
+    actual = candidate.run(texts)
+
+    probability_diff = float(np.abs(
+        InferenceBackend.probabilities(actual.logits) - InferenceBackend.probabilities(expected.logits)
+    ).max())
+    cosine = np.sum(actual.embeddings * expected.embeddings, axis=1) / (
+        np.linalg.norm(actual.embeddings, axis=1) * np.linalg.norm(expected.embeddings, axis=1)
+    )
+    min_cosine = float(cosine.min())
+    passed = probability_diff <= tolerance and min_cosine >= 1.0 - tolerance
+    log = logger.info if passed else logger.error
+    log(
+        f"Backend verification {'passed' if passed else 'failed'} for {candidate.model_name}: "
+        f"max probability diff {probability_diff:.4f}, min embedding cosine {min_cosine:.4f} (tolerance {tolerance})"
+    )
+    return passed
+
+
+def warm_up(backend: InferenceBackend, texts: List[str] = VERIFICATION_TEXTS):
+    """Runs a throwaway batch so lazy allocations and kernel selection happen before the first real email"""
+    processes = getattr(backend, "processes", 1)
+    texts = texts * max(1, -(-processes // len(texts)))  # At least one text per worker process
+    started = time.perf_counter()
+    backend.run(texts)
+    logger.info(f"Warmed up {backend.model_id} in {time.perf_counter() - started:.2f}s")
+
+
+def offline_mode() -> bool:
+    """Checks whether the Hugging Face hub is switched off, as it is in the container image"""
+    return any(os.environ.get(name, "").lower() in ("1", "true", "yes", "on") for name in ("HF_HUB_OFFLINE", "TRANSFORMERS_OFFLINE"))
+
+
+def configure_threads(intra_op_threads: Optional[int] = None, inter_op_threads: Optional[int] = None):
+    """Sets the torch intra-op and inter-op thread counts for this process"""
+    import torch
+
+    if intra_op_threads:
+        torch.set_num_threads(intra_op_threads)
+    if inter_op_threads:
+        try:
+            torch.set_num_interop_threads(inter_op_threads)
+        except RuntimeError as e:
+            # torch only allows this before any inter-op parallel work has started
+            logger.warning(f"Could not set torch inter-op threads to {inter_op_threads}: {e}")
+    logger.info(f"Torch threads: intra-op {torch.get_num_threads()}, inter-op {torch.get_num_interop_threads()}")
+
+
+def create_backend(model_name: str, revision: Optional[str] = None, engine: str = "torch",
+                   quantize: bool = False, cache_dir: str = "onnx_models",
+                   intra_op_threads: Optional[int] = None, inter_op_threads: Optional[int] = None) -> InferenceBackend:
+    """
+    Builds the configured inference backend, importing its ML dependencies on first use.
+    In offline mode the model is loaded strictly from the local cache
+    """
+    local_files_only = offline_mode()
+    if local_files_only:
+        logger.info(f"Offline mode: loading {model_name} from local files only")
+    if engine == "onnx":
+        from .onnx_backend import OnnxBackend
+        return OnnxBackend(model_name, revision, cache_dir=cache_dir, quantize=quantize,
+                           intra_op_threads=intra_op_threads, inter_op_threads=inter_op_threads,
+                           local_files_only=local_files_only)
+    if engine == "torch":
+        from .torch_backend import TorchBackend
+        return TorchBackend(model_name, revision, local_files_only=local_files_only)
+    raise ValueError(f"Unknown inference engine: {engine}")
+
+
+_worker_backend: Optional[InferenceBackend] = None
+
+
+def _init_worker(backend_kwargs: Dict[str, Any]):
+    """Process pool initializer: loads a private copy of the model in the worker"""
+    global _worker_backend
+    configure_threads(backend_kwargs.get("intra_op_threads"), backend_kwargs.get("inter_op_threads"))
+    _worker_backend = create_backend(**backend_kwargs)
+
+
+def _describe_worker() -> Tuple[str, str, Dict[int, str], int, int]:
+    """Returns the identity and input limits of the worker's backend"""
+    backend = _worker_backend
+    return backend.model_name, backend.model_id, backend.id2label, backend.max_length, backend.special_tokens
+
+
+def _run_in_worker(texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Runs a batch on the worker's backend"""
+    result = _worker_backend.run(texts)
+    return result.logits, result.embeddings
+
+
+def _encode_in_worker(text: str) -> Tuple[List[int], List[Tuple[int, int]]]:
+    """Tokenizes a text with the worker's tokenizer"""
+    encoding = _worker_backend.encode(text)
+    return encoding.input_ids, encoding.offsets
+
+
+def _run_ids_in_worker(rows: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Runs pre-tokenized rows on the worker's backend"""
+    result = _worker_backend.run_ids(rows)
+    return result.logits, result.embeddings
+
+
+class ProcessPoolBackend(InferenceBackend):
+    """
+    Runs inference in a pool of worker processes, each holding its own model copy,
+    so concurrent callers scale across cores instead of sharing one interpreter
+    """
+
+    def __init__(self, processes: int, backend_kwargs: Dict[str, Any]):
+        backend_kwargs = dict(backend_kwargs)
+        if not backend_kwargs.get("intra_op_threads"):
+            # Split the cores between workers rather than letting each one claim all of them
+            backend_kwargs["intra_op_threads"] = max(1, (os.cpu_count() or 1) // processes)
+        self.processes = processes
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(backend_kwargs,),
+        )
+        (self.model_name, self.model_id, self.id2label,
+         self.max_length, self.special_tokens) = self._executor.submit(_describe_worker).result()
+        logger.info(f"Started {processes} inference worker processes for {self.model_id}")
+
+    def run(self, texts: List[str]) -> InferenceResult:
+        """Splits the batch across the workers and reassembles the results in order"""
+        return self._map(_run_in_worker, texts)
+
+    def encode(self, text: str) -> TextEncoding:
+        """Tokenizes the text in a worker"""
+        input_ids, offsets = self._executor.submit(_encode_in_worker, text).result()
+        return TextEncoding(input_ids, offsets)
+
+    def run_ids(self, rows: List[List[int]]) -> InferenceResult:
+        """Splits the pre-tokenized rows across the workers and reassembles the results in order"""
+        return self._map(_run_ids_in_worker, rows)
+
+    def _map(self, function, items: List[Any]) -> InferenceResult:
+        """Runs function over even chunks of items, one per worker, and concatenates the results"""
+        chunk_size = max(1, -(-len(items) // self.processes))
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        outputs = list(self._executor.map(function, chunks))
+        return InferenceResult(
+            np.concatenate([logits for logits, _ in outputs]),
+            np.concatenate([embeddings for _, embeddings in outputs]),
+        )
+
+    def close(self):
+        """Waits for pending batches and stops the worker processes"""
+        self._executor.shutdown(wait=True)
+        logger.info(f"Stopped inference worker processes for {self.model_id}")
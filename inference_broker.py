@@ -0,0 +1,109 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from .inference import InferenceBackend, InferenceResult
+
+_STOP = object()
+
+
+class InferenceBroker:
+    """
+    Dynamic micro-batching front end for the inference backbone.
+    Worker threads submit texts and get a Future back; a dedicated inference thread
+    gathers pending requests until max_batch_size texts are queued or max_wait_ms has
+    passed since the first one arrived, then runs them through the model as one batch.
+    Requests name the backend they need, and only requests for the same backend and input kind
+    (texts or pre-tokenized rows) share a batch, so work submitted before a model swap still runs
+    on the model it started with
+    """
+
+    def __init__(self, max_batch_size: int = 32, max_wait_ms: float = 10):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._serve, name="inference-broker", daemon=True)
+        self._thread.start()
+        logger.info(f"Inference broker started (max_batch_size={max_batch_size}, max_wait_ms={max_wait_ms})")
+
+    def submit(self, items: List, backend: InferenceBackend, pretokenized: bool = False) -> "Future[InferenceResult]":
+        """
+        Queues texts, or rows of token ids when pretokenized, for the next batch on backend.
+        Once closed, runs them inline on the calling thread
+        """
+        future: "Future[InferenceResult]" = Future()
+        run = backend.run_ids if pretokenized else backend.run
+        with self._lock:
+            if not self._closed:
+                self._queue.put((items, run, future))
+                return future
+        try:
+            future.set_result(run(items))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def close(self):
+        """Stops accepting requests, finishes the queued ones and stops the inference thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join()
+        logger.info("Inference broker stopped.")
+
+    def _collect(self, first: Tuple) -> Tuple[List[Tuple], Optional[object]]:
+        """Gathers requests for the same backend method to batch with the first one. Returns the batch and any request that did not fit"""
+        batch = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP or item[1] != first[1] or size + len(item[0]) > self.max_batch_size:
+                return batch, item
+            batch.append(item)
+            size += len(item[0])
+        return batch, None
+
+    def _serve(self):
+        """Inference thread: runs batches until the stop marker is reached"""
+        carried = None
+        while True:
+            item = carried if carried is not None else self._queue.get()
+            carried = None
+            if item is _STOP:
+                return
+            batch, carried = self._collect(item)
+            self._run_batch(batch)
+
+    def _run_batch(self, batch: List[Tuple]):
+        """Runs one combined forward pass and hands each caller its slice of the result"""
+        texts = [text for request_texts, _, _ in batch for text in request_texts]
+        run = batch[0][1]
+        try:
+            result = run(texts) if texts else InferenceResult(np.zeros((0, 0)), np.zeros((0, 0)))
+        except Exception as e:
+            logger.error(f"Error running inference batch of {len(texts)} texts: {e}")
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        start = 0
+        for request_texts, _, future in batch:
+            end = start + len(request_texts)
+            future.set_result(InferenceResult(result.logits[start:end], result.embeddings[start:end]))
+            start = end
@@ -0,0 +1,77 @@
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton that finds every keyword occurrence in a single pass over the text"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = []
+        self._lengths: List[int] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        seen = set()
+        for keyword in keywords:
+            pattern = keyword.lower()
+            if not pattern or pattern in seen:
+                continue
+            seen.add(pattern)
+            self._add(pattern, len(self.keywords))
+            self.keywords.append(keyword)
+            self._lengths.append(len(pattern))
+        self._build_failure_links()
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def _add(self, pattern: str, keyword_index: int):
+        """Adds a pattern to the trie"""
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(keyword_index)
+
+    def _build_failure_links(self):
+        """Computes failure links breadth-first and merges outputs along them"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def _scan(self, text: str):
+        """Yields (keyword index, end offset) for every match in the text"""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        # Cleaned text keeps line breaks, which should not stop a phrase wrapped across lines from matching
+        for position, char in enumerate(text.lower().replace("\n", " ")):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword_index in output[state]:
+                yield keyword_index, position + 1
+
+    def find_all(self, text: str) -> List[Tuple[str, int]]:
+        """Returns every (keyword, start offset) occurrence in the text, overlapping matches included"""
+        keywords, lengths = self.keywords, self._lengths
+        return [(keywords[index], end - lengths[index]) for index, end in self._scan(text)]
+
+    def contains_any(self, text: str) -> bool:
+        """Checks if any keyword occurs in the text, stopping at the first match"""
+        for _ in self._scan(text):
+            return True
+        return False
@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+import re
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+
+class KeywordEmbeddingStore:
+    """
+    On-disk cache of keyword embeddings for a single model.
+    The matrix is kept as a .npy file that is memory-mapped on load, next to a
+    small JSON index recording the model id and the hash of the keyword in each row
+    """
+
+    def __init__(self, cache_dir: str, model_id: str):
+        self.cache_dir = cache_dir
+        self.model_id = model_id
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_id)
+        self.matrix_path = os.path.join(cache_dir, f"{slug}.npy")
+        self.index_path = os.path.join(cache_dir, f"{slug}.json")
+
+    @staticmethod
+    def keyword_hash(keyword: str) -> str:
+        """Returns the stable hash used to identify a keyword's row"""
+        return hashlib.sha256(keyword.encode("utf-8")).hexdigest()
+
+    def load(self) -> Tuple[Optional[np.ndarray], List[str]]:
+        """Memory-maps the cached matrix and returns it with the keyword hash of each row"""
+        if not os.path.exists(self.matrix_path) or not os.path.exists(self.index_path):
+            return None, []
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("model") != self.model_id:
+                logger.warning(f"Keyword embedding cache {self.index_path} belongs to another model. Ignoring it.")
+                return None, []
+            matrix = np.load(self.matrix_path, mmap_mode="r")
+            hashes = index.get("keywords", [])
+            if matrix.ndim != 2 or matrix.shape[0] != len(hashes):
+                logger.warning(f"Keyword embedding cache {self.matrix_path} does not match its index. Ignoring it.")
+                return None, []
+            return matrix, hashes
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading keyword embedding cache {self.matrix_path}: {e}")
+            return None, []
+        except Exception as e:
+            logger.exception(f"Unexpected error loading keyword embedding cache: {e}")
+            return None, []
+
+    def save(self, matrix: np.ndarray, hashes: List[str]):
+        """Atomically writes the matrix and its index, matrix first so a partial write is never trusted"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_matrix_path = f"{self.matrix_path}.tmp"
+            with open(tmp_matrix_path, "wb") as f:
+                np.save(f, np.ascontiguousarray(matrix, dtype=np.float32))
+            os.replace(tmp_matrix_path, self.matrix_path)
+
+            tmp_index_path = f"{self.index_path}.tmp"
+            with open(tmp_index_path, "w", encoding="utf-8") as f:
+                json.dump({"model": self.model_id, "keywords": hashes}, f)
+            os.replace(tmp_index_path, self.index_path)
+        except OSError as e:
+            logger.error(f"Error saving keyword embedding cache to {self.matrix_path}: {e}")
+        except Exception as e:
+            logger.exception(f"Unexpected error saving keyword embedding cache: {e}")
+
+    def get_matrix(self, keywords: List[str], embed: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Returns the embedding matrix for the keywords, in order.
+        Only keywords missing from the cache are passed to embed; if the cache already
+        holds exactly these keywords the memory-mapped matrix is returned without a copy
+        """
+        cached_matrix, cached_hashes = self.load()
+        hashes = [self.keyword_hash(keyword) for keyword in keywords]
+        if cached_matrix is not None and cached_hashes == hashes:
+            logger.info(f"Keyword embeddings loaded from {self.matrix_path}")
+            return cached_matrix
+
+        cached_rows = {keyword_hash: row for row, keyword_hash in enumerate(cached_hashes)}
+        missing = [keyword for keyword, keyword_hash in zip(keywords, hashes) if keyword_hash not in cached_rows]
+        new_matrix = embed(missing) if missing else None
+        if not keywords:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        dim = new_matrix.shape[1] if new_matrix is not None else cached_matrix.shape[1]
+        matrix = np.empty((len(keywords), dim), dtype=np.float32)
+        new_rows = iter(range(len(missing)))
+        for row, keyword_hash in enumerate(hashes):
+            if keyword_hash in cached_rows:
+                matrix[row] = cached_matrix[cached_rows[keyword_hash]]
+            else:
+                matrix[row] = new_matrix[next(new_rows)]
+
+        logger.info(f"Embedded {len(missing)} new or changed keywords, reused {len(keywords) - len(missing)} from cache")
+        self.save(matrix, hashes)
+        return matrix
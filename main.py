@@ -54,8 +54,7 @@ def check_for_feedback(mailbox_address: str, access_token_queue: queue.Queue, em
                       )
                       params = {"$filter": filter_query, "$top": config.top_emails}
 
-                    response = requests.get(graph_api_url, headers=headers, params=params)
-                    response.raise_for_status()
+                    response = email_client._make_graph_api_request(graph_api_url, headers, params=params)
                     messages = response.json().get("value", [])
 
                     for message in messages:
@@ -121,8 +120,7 @@ def main_email_loop(mailbox_address: str, access_token_queue: queue.Queue, email
 
                 if config_reload_event.is_set():
                     logger.info(f"Configuration reload detected in main email loop for {mailbox_address}.")
-                    complaint_processor.reload_keywords()
-                    complaint_processor.reload_sentiment_pipeline()
+                    complaint_processor.schedule_reload()  # Swaps the new model in when ready, without pausing this loop
                     config_reload_event.clear()
 
                 with shared_resource_lock:
@@ -131,8 +129,16 @@ def main_email_loop(mailbox_address: str, access_token_queue: queue.Queue, email
                     )
 
                 if emails:
-                    for message in emails:
-                        complaint_processor.process_email(message, access_token, mailbox_address)
+                    try:
+                        for message in emails:
+                            complaint_processor.process_email(message, access_token, mailbox_address)
+                    finally:
+                        # Forward and delete this poll's complaints in $batch calls, even if a later message failed
+                        email_client.flush_actions(access_token)
+                    if complaint_processor.embedding_cache:
+                        logger.debug(f"Embedding cache stats: {complaint_processor.embedding_cache.stats()}")
+                    if config.get("cascade", {}).get("enabled", False):
+                        logger.debug(f"Classification cascade stats: {complaint_processor.cascade_stats.snapshot()}")
 
                 if new_delta_token:
                     delta_tokens[mailbox_address] = new_delta_token
@@ -242,5 +248,11 @@ def main():
             executor.shutdown(wait=False)
             stop_config_thread_event.set()  # Signal the config thread to stop
             config_thread.join()  # Wait for the config thread to finish
+            complaint_processor.close()  # Stop the inference broker thread
             email_client._save_cache()  # Save the token cache
+            email_client.close()  # Close the pooled Graph API connections
             logger.info("Exiting main process.")
+
+
+if __name__ == "__main__":
+    main()
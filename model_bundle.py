@@ -0,0 +1,74 @@
+import gc
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from .inference import InferenceBackend
+from .keyword_matcher import KeywordMatcher
+
+
+class ModelBundle:
+    """
+    The backbone and keyword artifacts that classifications run against, built and swapped in as one unit.
+    Classifications lease the bundle for their duration; once a reload retires it, its model is
+    closed and its memory released when the last lease ends
+    """
+
+    def __init__(
+        self,
+        backbone: InferenceBackend,
+        backend_settings: Dict[str, Any],
+        complaint_keywords: List[str],
+        keyword_matcher: KeywordMatcher,
+        keyword_matrix: np.ndarray,
+        keywords_digest: str,
+    ):
+        self.backbone = backbone
+        self.backend_settings = backend_settings
+        self.complaint_keywords = complaint_keywords
+        self.keyword_matcher = keyword_matcher
+        self.keyword_index = {keyword: i for i, keyword in enumerate(complaint_keywords)}
+        self.keyword_matrix = keyword_matrix
+        self.keywords_digest = keywords_digest
+        self._lock = threading.Lock()
+        self._leases = 0
+        self._retired = False
+        self._keep_backbone = False
+
+    @property
+    def model_id(self) -> str:
+        """Identifies the bundle's model, revision and engine"""
+        return self.backbone.model_id
+
+    def acquire(self):
+        """Takes a lease, keeping the model open until the matching release"""
+        with self._lock:
+            self._leases += 1
+
+    def release(self):
+        """Ends a lease, freeing the model if the bundle has been retired and this was the last one"""
+        with self._lock:
+            self._leases -= 1
+            free = self._retired and self._leases == 0
+        if free:
+            self._free()
+
+    def retire(self, successor: Optional["ModelBundle"] = None):
+        """Marks the bundle as replaced. Its model is freed now, or when in-flight classifications finish"""
+        with self._lock:
+            self._retired = True
+            self._keep_backbone = successor is not None and successor.backbone is self.backbone
+            free = self._leases == 0
+        if free:
+            self._free()
+
+    def _free(self):
+        """Closes the backbone unless the successor reuses it, and drops the references holding model memory"""
+        if not self._keep_backbone:
+            logger.info(f"Releasing retired model {self.backbone.model_id}")
+            self.backbone.close()
+        self.backbone = None
+        self.keyword_matrix = None
+        gc.collect()
@@ -0,0 +1,93 @@
+import os
+import re
+from typing import Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from .transformer_backend import TransformerBackend
+
+
+class OnnxBackend(TransformerBackend):
+    """
+    Runs the model with ONNX Runtime on the CPU, optionally with dynamic int8 quantization.
+    The exported graph is cached on disk per model, revision and precision
+    """
+
+    def __init__(self, model_name: str, revision: Optional[str] = None, max_length: int = 512,
+                 cache_dir: str = "onnx_models", quantize: bool = False,
+                 intra_op_threads: Optional[int] = None, inter_op_threads: Optional[int] = None,
+                 local_files_only: bool = False):
+        super().__init__(model_name, revision, max_length, local_files_only)
+        self.model_id += "#onnx-int8" if quantize else "#onnx"
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError("The onnx inference engine requires the onnxruntime package.") from e
+
+        self.model_path = self.export(model_name, revision, cache_dir, quantize, local_files_only)
+        options = onnxruntime.SessionOptions()
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        if inter_op_threads:
+            options.inter_op_num_threads = inter_op_threads
+        self.session = onnxruntime.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+
+    @staticmethod
+    def artifact_path(model_name: str, revision: Optional[str], cache_dir: str, quantize: bool) -> str:
+        """Returns where the exported graph for a model, revision and precision is cached"""
+        model_id = f"{model_name}@{revision}" if revision else model_name
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_id)
+        return os.path.join(cache_dir, f"{slug}{'-int8' if quantize else ''}.onnx")
+
+    @classmethod
+    def export(cls, model_name: str, revision: Optional[str], cache_dir: str, quantize: bool,
+               local_files_only: bool = False) -> str:
+        """Exports the model to ONNX (and quantizes it) unless a cached artifact already exists"""
+        path = cls.artifact_path(model_name, revision, cache_dir, quantize)
+        if os.path.exists(path):
+            logger.info(f"Using cached ONNX model: {path}")
+            return path
+
+        os.makedirs(cache_dir, exist_ok=True)
+        fp32_path = cls.artifact_path(model_name, revision, cache_dir, False)
+        if not os.path.exists(fp32_path):
+            import torch
+            from transformers import AutoModelForSequenceClassification
+            from .torch_backend import PooledClassifier
+
+            logger.info(f"Exporting {model_name} to ONNX: {fp32_path}")
+            model = PooledClassifier(AutoModelForSequenceClassification.from_pretrained(
+                model_name, revision=revision, local_files_only=local_files_only
+            ))
+            model.eval()
+            dummy = torch.ones((1, 8), dtype=torch.int64)
+            tmp_path = f"{fp32_path}.tmp"
+            torch.onnx.export(
+                model,
+                (dummy, dummy),
+                tmp_path,
+                input_names=["input_ids", "attention_mask"],
+                output_names=["logits", "embeddings"],
+                dynamic_axes={
+                    "input_ids": {0: "batch", 1: "sequence"},
+                    "attention_mask": {0: "batch", 1: "sequence"},
+                    "logits": {0: "batch"},
+                    "embeddings": {0: "batch"},
+                },
+                opset_version=17,
+                dynamo=False,
+            )
+            os.replace(tmp_path, fp32_path)
+
+        if quantize:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            logger.info(f"Quantizing {fp32_path} to int8: {path}")
+            tmp_path = f"{path}.tmp"
+            quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+            os.replace(tmp_path, path)
+        return path
+
+    def _forward(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        logits, embeddings = self.session.run(None, {"input_ids": input_ids, "attention_mask": attention_mask})
+        return logits.astype(np.float32), embeddings.astype(np.float32)
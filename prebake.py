@@ -0,0 +1,32 @@
+"""
+Bakes model artifacts into the container image at build time: downloads the configured model
+into the local Hugging Face cache, exports (and quantizes) it when the onnx engine is configured,
+and precomputes the complaint keyword embeddings, so the runtime can start offline.
+
+    python -m app.prebake [config.json]
+"""
+import sys
+
+from loguru import logger
+
+from .complaint_processor import ComplaintProcessor
+from .config_loader import Config
+from .inference import offline_mode
+
+
+def main(config_file: str = "config.json"):
+    if offline_mode():
+        logger.warning("The Hugging Face hub is switched off; prebaking can only use files that are already cached.")
+    config = Config(config_file, "config_schema.json")
+    complaint_processor = ComplaintProcessor(None, config)
+    try:
+        logger.info(
+            f"Prebaked {complaint_processor.model_id} and embeddings for "
+            f"{len(complaint_processor.complaint_keywords)} complaint keywords."
+        )
+    finally:
+        complaint_processor.close()
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
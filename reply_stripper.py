@@ -0,0 +1,101 @@
+import re
+from typing import List, Optional, Tuple
+
+# Headers that introduce quoted reply history. Everything from the earliest one onwards is dropped.
+# The patterns expect cleaned text (lowercased, horizontal whitespace collapsed, line breaks kept), as produced
+# by clean_email, and only match at the start of a line so the same words inside a sentence are left alone
+_DAY_OR_DATE = r"(?:mon|tue|wed|thu|fri|sat|sun|jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec|\d)"
+QUOTE_HEADER_PATTERN = re.compile(
+    "|".join([
+        # Gmail / Apple Mail / plain text: "On <date>, <name> wrote:", possibly wrapped onto a second line
+        rf"^on\s{_DAY_OR_DATE}[^\n]{{0,150}}?(?:\n[^\n]{{0,100}}?)?\bwrote:[^\S\n]*$",
+        r"^from:\s[^\n]{1,200}\n(?:[^\n]*\n){0,2}(?:sent|date):\s",  # Outlook: "From: ..." with "Sent: ..." a line or two below
+        r"^-{3,}\s*original message\s*-{3,}",  # Outlook plain text: "-----Original Message-----"
+        r"^_{10,}[^\S\n]*$",  # Outlook HTML separator line before the "From:" block
+    ]),
+    re.MULTILINE,
+)
+
+# A note above a quote header with no more words than this (e.g. "fyi see below.") is a forward,
+# and the forwarded message is the content to classify, so it is kept
+FORWARD_NOTE_MAX_WORDS = 8
+
+# Markers that start a signature block, each on a line of its own. Only honoured near the end of the message
+SIGNATURE_PATTERN = re.compile(
+    "|".join([
+        r"^--[^\S\n]*$",  # RFC 3676 signature delimiter
+        r"^sent from my\s\w+",
+        r"^get outlook for\s\w+",
+    ]),
+    re.MULTILINE,
+)
+
+# A sign-off only counts as a closing when nothing but a name follows it to the end of the text:
+# one or two short name lines below it ("thanks,\njohn smith"), or at most two name-like words after
+# a comma ("regards, j. smith"). Sign-offs also appear mid-message ("thanks, but it arrived broken...",
+# "with regards to order 123", "thanks, never buying again"), where they must stay
+_SIGN_OFF = r"(?:(?:best|kind|warm)\s)?regards|sincerely|cheers|many thanks|thanks|thank you"
+SIGN_OFF_PATTERN = re.compile(rf"(?:^|(?<=[\s.!?]))(?:{_SIGN_OFF})\b(?P<punctuation>[,.!]?)")
+NAME_WORD_PATTERN = re.compile(r"[^\W\d_][\w.'-]*")
+NAME_LINE_MAX_WORDS = 3
+INLINE_NAME_MAX_WORDS = 2
+
+# Words that make a tail after a sign-off a sentence rather than a name
+STOP_WORDS = {
+    "a", "again", "all", "also", "am", "an", "and", "any", "are", "as", "at", "be", "but", "by", "can", "did",
+    "do", "for", "from", "had", "has", "have", "he", "her", "his", "how", "i", "if", "in", "is", "it", "its",
+    "just", "me", "my", "never", "no", "not", "nothing", "now", "of", "on", "or", "our", "really", "she", "so",
+    "that", "the", "their", "them", "then", "they", "this", "to", "too", "very", "was", "we", "were", "what",
+    "when", "why", "will", "with", "would", "you", "your", "absolutely", "totally",
+}
+
+
+def _is_name(words: List[str], max_words: int) -> bool:
+    """Checks if words could be a name: few, name-like and none of them stop words"""
+    return 0 < len(words) <= max_words and all(
+        NAME_WORD_PATTERN.fullmatch(word) and word.strip(".") not in STOP_WORDS for word in words
+    )
+
+
+def _closing_start(text: str, search_from: int) -> Optional[int]:
+    """Returns where a closing sign-off, and the name after it, starts in text, if it ends with one"""
+    for sign_off in SIGN_OFF_PATTERN.finditer(text, search_from):
+        tail = text[sign_off.end():]
+        if not tail.strip():
+            return sign_off.start()
+        same_line, _, below = tail.partition("\n")
+        if same_line.strip():
+            if sign_off.group("punctuation") and not below.strip() and _is_name(same_line.split(), INLINE_NAME_MAX_WORDS):
+                return sign_off.start()
+        else:
+            lines = below.strip().split("\n")
+            if len(lines) <= 2 and all(_is_name(line.split(), NAME_LINE_MAX_WORDS) for line in lines):
+                return sign_off.start()
+    return None
+
+
+def strip_quoted_text(text: str, strip_signatures: bool = True, signature_max_chars: int = 400) -> Tuple[str, int]:
+    """
+    Removes quoted reply history and, optionally, a trailing signature from cleaned email text.
+    Returns the new content and how many characters were removed. Quoted text under a short
+    forwarding note is kept, and if stripping would leave nothing, the text is returned unchanged
+    """
+    stripped = text
+    quote_header = QUOTE_HEADER_PATTERN.search(stripped)
+    if quote_header:
+        above = stripped[:quote_header.start()].rstrip()
+        if len(above.split()) > FORWARD_NOTE_MAX_WORDS:
+            stripped = above
+
+    if strip_signatures and stripped:
+        tail_start = max(0, len(stripped) - signature_max_chars)
+        signature = SIGNATURE_PATTERN.search(stripped, tail_start)
+        if signature:
+            stripped = stripped[:signature.start()].rstrip()
+        closing = _closing_start(stripped, tail_start)
+        if closing is not None:
+            stripped = stripped[:closing].rstrip()
+
+    if not stripped:
+        return text, 0
+    return stripped, len(text) - len(stripped)
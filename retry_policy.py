@@ -0,0 +1,88 @@
+import random
+import re
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Deque, Dict, Optional
+
+# Statuses worth retrying: timeouts, throttling and transient server errors. Other 4xx responses
+# (bad request, auth, not found, ...) fail the same way every time
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+MAILBOX_PATTERN = re.compile(r"/users/([^/?]+)")
+
+
+def is_retryable_status(status: Optional[int]) -> bool:
+    """Checks if a request that ended with this HTTP status may succeed if sent again"""
+    return status in RETRYABLE_STATUS
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses a Retry-After header, given in seconds or as an HTTP date, into seconds from now"""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def mailbox_of(url: str) -> str:
+    """Returns the mailbox a Graph API URL addresses, or '*' for calls that span mailboxes such as $batch"""
+    match = MAILBOX_PATTERN.search(url)
+    return match.group(1).lower() if match else "*"
+
+
+class RetryBudget:
+    """
+    Thread-safe, per-mailbox cap on retries: at most max_retries retries in any window of window seconds.
+    Once a throttled mailbox has spent its budget, its failures are returned instead of adding more load
+    """
+
+    def __init__(self, max_retries: int = 20, window: float = 60):
+        self.max_retries = max_retries
+        self.window = window
+        self._retries: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def try_acquire(self, mailbox: str) -> bool:
+        """Spends one retry from the mailbox's budget, returning False if none is left"""
+        now = time.monotonic()
+        with self._lock:
+            retries = self._retries.setdefault(mailbox, deque())
+            while retries and retries[0] <= now - self.window:
+                retries.popleft()
+            if len(retries) >= self.max_retries:
+                return False
+            retries.append(now)
+            return True
+
+
+class RetryPolicy:
+    """
+    When and how long to wait before retrying a Graph API request: capped exponential backoff with
+    full jitter, so throttled threads and mailboxes spread their retries out instead of retrying in
+    lockstep, unless the service sent a Retry-After, which is honoured
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 5, max_delay: float = 60,
+                 budget: Optional[RetryBudget] = None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Returns the delay before retrying after the given failed attempt (counted from 0)"""
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def should_retry(self, attempt: int, mailbox: str) -> bool:
+        """Checks if the given failed attempt may be retried, spending from the mailbox's budget if so"""
+        return attempt < self.max_attempts - 1 and self.budget.try_acquire(mailbox)
@@ -0,0 +1,65 @@
+import re
+from typing import List, Tuple
+
+# Candidate sentence boundaries: terminal punctuation (with any closing quotes or brackets) followed by
+# whitespace, a line break, or a list bullet. Matched spans are gaps between sentences
+BOUNDARY_PATTERN = re.compile(r"""(?P<terminal>[.?!]+["')\]]*)\s+|\n\s*(?:[-*]\s+|\d{1,2}[.)]\s+)?|[•·▪◦‣●]\s*""")
+
+# Words whose trailing '.' does not end a sentence. Text is expected lowercased, as produced by clean_email
+ABBREVIATIONS = {"mr.", "mrs.", "ms.", "dr.", "st.", "vs.", "etc.", "jr.", "sr.", "approx.", "dept."}
+
+# Abbreviations only when a number follows, as in "order no. 123"; otherwise they are words ending a sentence
+NUMBER_ABBREVIATIONS = {"no.", "nos."}
+
+MAX_SENTENCE_CHARS = 400
+
+
+def _is_abbreviation(text: str, period: int, next_start: int) -> bool:
+    """
+    Checks if the '.' at period closes an abbreviation such as "dr." or "e.g." rather than a sentence.
+    next_start is where the text after the boundary starts
+    """
+    word_start = max(text.rfind(" ", 0, period), text.rfind("\n", 0, period)) + 1
+    word = text[word_start:period + 1].lower()
+    if word in NUMBER_ABBREVIATIONS:
+        return text[next_start:next_start + 1].isdigit()
+    return word in ABBREVIATIONS or "." in word[:-1]
+
+
+def _add_span(spans: List[Tuple[int, int]], text: str, start: int, end: int, max_chars: int):
+    """Appends text[start:end] as one sentence, or several split at whitespace if it is longer than max_chars"""
+    while end - start > max_chars:
+        cut = text.rfind(" ", start + 1, start + max_chars + 1)
+        if cut <= start:
+            cut = start + max_chars  # A single overlong word
+        spans.append((start, cut))
+        start = cut
+        while start < end and text[start].isspace():
+            start += 1
+    if end > start:
+        spans.append((start, end))
+
+
+def segment_sentences(text: str, max_chars: int = MAX_SENTENCE_CHARS) -> List[Tuple[int, int]]:
+    """
+    Splits text into sentences in one linear pass, returning (start, end) character offsets rather than copies.
+    Sentences end at '.', '?' or '!' followed by whitespace, at line breaks and at list bullets, and are
+    capped at max_chars so the cost of embedding any one sentence is bounded
+    """
+    spans: List[Tuple[int, int]] = []
+    start = len(text) - len(text.lstrip())
+    for boundary in BOUNDARY_PATTERN.finditer(text):
+        terminal = boundary.group("terminal")
+        if terminal == "." and _is_abbreviation(text, boundary.start(), boundary.end()):
+            continue
+        # Terminal punctuation stays with its sentence; line breaks and bullets belong to neither side
+        sentence_end = boundary.end("terminal") if terminal else boundary.start()
+        while sentence_end > start and text[sentence_end - 1].isspace():
+            sentence_end -= 1
+        if sentence_end > start:
+            _add_span(spans, text, start, sentence_end, max_chars)
+        start = max(start, boundary.end())
+    end = len(text.rstrip())
+    if end > start:
+        _add_span(spans, text, start, end, max_chars)
+    return spans
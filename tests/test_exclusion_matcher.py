@@ -0,0 +1,46 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from exclusion_matcher import ExclusionMatcher  # noqa: E402
+
+
+def test_globs_domains_and_regexes():
+    matcher = ExclusionMatcher(["no-reply@*", "@example.com", r"automated-system@.*\.example\.org"], ["Out of Office"])
+    assert matcher.is_excluded_sender("NO-REPLY@shop.com")
+    assert matcher.is_excluded_sender("jane@Example.com")
+    assert matcher.is_excluded_sender("automated-system@mail.example.org")
+    assert not matcher.is_excluded_sender("jane@shop.com")
+    assert matcher.is_excluded_subject("Out of Office: back monday")
+    assert not matcher.is_excluded_subject("Re: Out of Office")
+
+
+def test_global_inline_flag_stays_scoped_to_its_entry():
+    matcher = ExclusionMatcher(["(?i)NOREPLY.*", "Alerts@.*"], [])
+    assert matcher.is_excluded_sender("noreply@shop.com")
+    assert matcher.is_excluded_sender("Alerts@shop.com")
+    assert not matcher.is_excluded_sender("alerts@shop.com")
+
+
+def test_repeated_named_groups_and_backreferences():
+    matcher = ExclusionMatcher([], [r"(?P<tag>\[\w+\]) (?P=tag)", r"(?P<tag>FW): ", r"(\w+) \1$"])
+    assert matcher.is_excluded_subject("[ext] [ext] order")
+    assert matcher.is_excluded_subject("FW: order")
+    assert matcher.is_excluded_subject("spam spam")
+    assert not matcher.is_excluded_subject("spam eggs")
+
+
+def test_invalid_entry_is_ignored():
+    matcher = ExclusionMatcher(["(unclosed", "bot@.*"], [])
+    assert matcher.is_excluded_sender("bot@shop.com")
+    assert not matcher.is_excluded_sender("(unclosed")
+
+
+def test_regexes_with_wildcard_characters_stay_regexes():
+    matcher = ExclusionMatcher(["glob:*bot?@shop.com"], ["Re: ?Out of Office", "glob:*[[]ext]*"])
+    assert matcher.is_excluded_subject("Re: Out of Office: back monday")
+    assert matcher.is_excluded_subject("Re:Out of Office")
+    assert not matcher.is_excluded_subject("Re: ?Out of Office")
+    assert matcher.is_excluded_subject("FW: [EXT] order")
+    assert matcher.is_excluded_sender("Alertbot1@shop.com")
+    assert not matcher.is_excluded_sender("alertbot@shop.com")
@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from html_text import html_to_text  # noqa: E402
+
+
+def test_apostrophes_in_attribute_values():
+    assert html_to_text("<p title=\"Don't\">I am furious</p><div>Regards</div>") == "i am furious\nregards"
+    assert html_to_text("<img alt=\"Bob's photo\" data-x='a>b'>Broken on arrival") == "broken on arrival"
+
+
+def test_quoted_tag_scan_is_linear():
+    markup = "<p title=\"Don't\">x</p>" + "<div class=\"a\">word</div>" * 20000
+    started = time.perf_counter()
+    text = html_to_text(markup)
+    assert time.perf_counter() - started < 2
+    assert text.count("word") == 20000
+
+
+def test_entities_are_decoded():
+    assert html_to_text("<p>Fish &amp; chips &lt;cold&gt; &#39;again&#39;&nbsp;today</p>") == "fish & chips <cold> 'again' today"
+
+
+def test_head_script_and_style_are_skipped():
+    markup = (
+        "<html><head><title>Newsletter</title><style>p { color: red; }</style></head>"
+        "<body><script>if (a < b) { track(); }</script><p>Refund me</p></body></html>"
+    )
+    assert html_to_text(markup) == "refund me"
+
+
+def test_inline_base64_is_dropped():
+    assert html_to_text("<p>See data:image/png;base64,iVBORw0KGgo= the damage</p>") == "see the damage"
+    assert html_to_text("<img src=\"data:image/png;base64,iVBORw0KGgo=\"><p>Cracked</p>") == "cracked"
+
+
+def test_literal_less_than_and_unterminated_tag_stay_text():
+    assert html_to_text("<p>2 < 3</p>") == "2 < 3"
+    assert html_to_text("ok <p title=\"open") == "ok <p title=\"open"
+
+
+def test_source_line_breaks_in_html_are_spaces():
+    markup = "<p>honestly you really let\r\ndown your customers and i feel\r\nmisled</p>"
+    assert html_to_text(markup) == "honestly you really let down your customers and i feel misled"
+    assert html_to_text("hello \n <b>world</b>") == "hello world"
+
+
+def test_block_tags_and_br_break_lines():
+    assert html_to_text("<ul><li>One</li><li>Two</li></ul>Three<br>Four") == "one\ntwo\nthree\nfour"
+
+
+def test_plain_text_keeps_line_breaks():
+    assert html_to_text("Hello \n world\r\n\r\n- one") == "hello\nworld\n- one"
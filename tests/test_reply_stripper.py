@@ -0,0 +1,82 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from html_text import html_to_text  # noqa: E402
+from reply_stripper import strip_quoted_text  # noqa: E402
+
+
+def strip(body: str) -> str:
+    return strip_quoted_text(html_to_text(body))[0]
+
+
+def test_mid_sentence_thanks_is_kept():
+    body = "i ordered a phone. thanks, but it arrived broken and i want a refund now!"
+    assert strip(body) == body
+
+
+def test_with_regards_to_is_kept():
+    body = "with regards to order 123, the item is broken and nobody has answered my emails"
+    assert strip(body) == body
+
+
+def test_inline_double_dash_is_kept():
+    body = "the blender broke after two days -- please refund me immediately"
+    assert strip(body) == body
+
+
+def test_wrote_inside_a_sentence_is_kept():
+    body = "i called on monday and your agent wrote: nothing useful. i am furious about this"
+    assert strip(body) == body
+
+
+def test_forward_under_a_short_note_is_kept():
+    body = "fyi see below.\nfrom: customer\nsent: monday\nsubject: broken\nmy order arrived broken, refund me"
+    assert strip(body) == body
+    body = "fyi see below. from: customer sent: monday subject: broken my order arrived broken, refund me"
+    assert strip(body) == body
+
+
+def test_closing_with_name_is_stripped():
+    assert strip("my order arrived broken, refund me.<br>thanks,<br>John Smith") == "my order arrived broken, refund me."
+    assert strip("my order arrived broken, refund me. kind regards, j. smith") == "my order arrived broken, refund me."
+
+
+def test_trailing_thanks_for_nothing_is_kept():
+    body = "i waited three weeks for a reply. thank you for nothing"
+    assert strip(body) == body
+
+
+def test_signature_delimiter_on_its_own_line_is_stripped():
+    body = "<p>the charger is missing from the box</p><p>-- </p><p>jane doe<br>acme ltd</p>"
+    assert strip(body) == "the charger is missing from the box"
+
+
+def test_outlook_reply_history_is_stripped():
+    body = (
+        "<p>this is the third time i am writing and the refund has still not arrived. fix it.</p>"
+        "<hr><p>From: Support<br>Sent: Monday, 1 April<br>To: Jane</p><p>we are looking into it</p>"
+    )
+    assert strip(body) == "this is the third time i am writing and the refund has still not arrived. fix it."
+
+
+def test_gmail_reply_history_is_stripped():
+    body = (
+        "still broken after the repair, i want my money back now please.\n\n"
+        "On Mon, 1 Apr 2024 at 10:00, Support <support@example.com> wrote:\n> please try restarting it"
+    )
+    assert strip(body) == "still broken after the repair, i want my money back now please."
+
+
+def test_sentences_after_a_sign_off_are_kept():
+    for body in [
+        "the item arrived broken. thanks, never buying again",
+        "i waited a month for my order. thanks, your service sucks",
+        "my refund never came. regards, absolutely furious customer",
+    ]:
+        assert strip(body) == body
+
+
+def test_name_lines_below_a_sign_off_are_stripped():
+    assert strip("<p>my refund never came.</p><p>Kind regards,<br>Jane Doe<br>Acme Ltd</p>") == "my refund never came."
+    assert strip("my refund never came. cheers") == "my refund never came."
@@ -0,0 +1,31 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from html_text import html_to_text  # noqa: E402
+from sentence_segmenter import segment_sentences  # noqa: E402
+
+
+def sentences(body: str):
+    text = html_to_text(body)
+    return [text[start:end] for start, end in segment_sentences(text)]
+
+
+def test_html_list_items_and_lines_split():
+    body = "<ul><li>Item one is missing</li><li>Item two is cracked</li></ul><p>Line one<br>Line two</p>"
+    assert sentences(body) == ["item one is missing", "item two is cracked", "line one", "line two"]
+
+
+def test_plain_text_bullets_split():
+    body = "Hello,\n- the box was crushed\n- the charger is missing\n1. refund me"
+    assert sentences(body) == ["hello,", "the box was crushed", "the charger is missing", "refund me"]
+
+
+def test_no_only_abbreviates_before_a_number():
+    body = "call me back? no. i am furious about order no. 55 and i want a refund"
+    assert sentences(body) == ["call me back?", "no.", "i am furious about order no. 55 and i want a refund"]
+
+
+def test_wrapped_html_source_lines_stay_one_sentence():
+    body = "<p>you really let\r\ndown your customers</p>"
+    assert sentences(body) == ["you really let down your customers"]
@@ -0,0 +1,42 @@
+from typing import Optional, Tuple
+
+import numpy as np
+import torch
+from transformers import AutoModelForSequenceClassification
+
+from .transformer_backend import TransformerBackend
+
+
+class PooledClassifier(torch.nn.Module):
+    """
+    Wraps a sequence-classification model so one forward pass returns the logits together with
+    the attention-masked mean of the last hidden state used for contextual scoring
+    """
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        outputs = self.model(input_ids=input_ids, attention_mask=attention_mask, output_hidden_states=True)
+        hidden_state = outputs.hidden_states[-1]
+        mask = attention_mask.unsqueeze(-1).to(hidden_state.dtype)
+        embeddings = (hidden_state * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+        return outputs.logits, embeddings
+
+
+class TorchBackend(TransformerBackend):
+    """Runs the model eagerly with PyTorch"""
+
+    def __init__(self, model_name: str, revision: Optional[str] = None, max_length: int = 512,
+                 local_files_only: bool = False):
+        super().__init__(model_name, revision, max_length, local_files_only)
+        self.model = PooledClassifier(AutoModelForSequenceClassification.from_pretrained(
+            model_name, revision=revision, local_files_only=local_files_only
+        ))
+        self.model.eval()
+
+    def _forward(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        with torch.inference_mode():
+            logits, embeddings = self.model(torch.from_numpy(input_ids), torch.from_numpy(attention_mask))
+        return logits.float().numpy(), embeddings.float().numpy()
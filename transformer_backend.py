@@ -0,0 +1,62 @@
+from abc import abstractmethod
+from typing import List, Optional, Tuple
+
+import numpy as np
+from transformers import AutoConfig, AutoTokenizer
+
+from .inference import InferenceBackend, InferenceResult, TextEncoding
+
+
+class TransformerBackend(InferenceBackend):
+    """Base for backends that tokenize locally and run a single forward pass per batch"""
+
+    def __init__(self, model_name: str, revision: Optional[str] = None, max_length: int = 512,
+                 local_files_only: bool = False):
+        self.model_name = model_name
+        self.revision = revision
+        self.model_id = f"{model_name}@{revision}" if revision else model_name
+        self.max_length = max_length
+        self.local_files_only = local_files_only
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name, revision=revision, local_files_only=local_files_only)
+        self.id2label = AutoConfig.from_pretrained(model_name, revision=revision, local_files_only=local_files_only).id2label
+        self._special_prefix, self._special_suffix = self._special_tokens()
+        self.special_tokens = len(self._special_prefix) + len(self._special_suffix)
+
+    def _special_tokens(self) -> Tuple[List[int], List[int]]:
+        """Returns the special token ids the tokenizer puts before and after a single sequence"""
+        with_specials = self.tokenizer("a")["input_ids"]
+        without_specials = self.tokenizer("a", add_special_tokens=False)["input_ids"]
+        for start in range(len(with_specials) - len(without_specials) + 1):
+            if with_specials[start:start + len(without_specials)] == without_specials:
+                return with_specials[:start], with_specials[start + len(without_specials):]
+        return [], []
+
+    def run(self, texts: List[str]) -> InferenceResult:
+        """Tokenizes the texts as one padded batch and runs the model once"""
+        inputs = self.tokenizer(texts, return_tensors="np", padding=True, truncation=True, max_length=self.max_length)
+        logits, embeddings = self._forward(inputs["input_ids"].astype(np.int64), inputs["attention_mask"].astype(np.int64))
+        return InferenceResult(logits, embeddings)
+
+    def encode(self, text: str) -> TextEncoding:
+        """Tokenizes the text once without special tokens, keeping each token's character offsets"""
+        encoded = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+        return TextEncoding(encoded["input_ids"], encoded["offset_mapping"])
+
+    def run_ids(self, rows: List[List[int]]) -> InferenceResult:
+        """Adds the special tokens to each row, truncating it as the tokenizer would, and runs them as one padded batch"""
+        prefix, suffix = self._special_prefix, self._special_suffix
+        content_length = self.max_length - self.special_tokens
+        rows = [prefix + row[:content_length] + suffix for row in rows]
+
+        width = max(len(row) for row in rows)
+        input_ids = np.full((len(rows), width), self.tokenizer.pad_token_id or 0, dtype=np.int64)
+        attention_mask = np.zeros((len(rows), width), dtype=np.int64)
+        for i, row in enumerate(rows):
+            input_ids[i, :len(row)] = row
+            attention_mask[i, :len(row)] = 1
+        logits, embeddings = self._forward(input_ids, attention_mask)
+        return InferenceResult(logits, embeddings)
+
+    @abstractmethod
+    def _forward(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        pass
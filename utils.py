@@ -1,6 +1,7 @@
 from loguru import logger
 from .config_loader import Config
-import re, json, os
+from .html_text import html_to_text
+import json, os
 from typing import List, Dict
 
 def load_keywords_from_file(filepath: str) -> List[str]:
@@ -71,7 +72,5 @@ def parse_interval(interval_str: str) -> int:
         raise ValueError("Invalid time unit. Use 's', 'm', or 'h'.")
 
 def clean_email(email_str: str) -> str:
-    """Cleans an email string by removing HTML tags and extra spaces"""
-    clean_text = re.sub('<[^<]+?>', '', email_str)  # Remove HTML tags
-    clean_text = re.sub(r'\s+', ' ', clean_text).strip()  # Remove extra spaces
-    return clean_text.lower()
\ No newline at end of file
+    """Cleans an email string by extracting its visible text, collapsing spaces and case folding"""
+    return html_to_text(email_str)
\ No newline at end of file
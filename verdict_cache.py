@@ -0,0 +1,83 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from loguru import logger
+
+
+class VerdictCache:
+    """
+    Persistent cache of complaint verdicts keyed by a hash of the cleaned message content
+    and the classifier version, stored in a local SQLite database with a TTL and a size cap
+    """
+
+    PRUNE_INTERVAL = 100  # Writes between expiry / size-cap sweeps
+
+    def __init__(self, path: str, ttl_seconds: int, max_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS verdicts (key TEXT PRIMARY KEY, verdict INTEGER NOT NULL, created REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS verdicts_created ON verdicts (created)")
+        logger.info(f"Verdict cache opened at {path}")
+
+    @staticmethod
+    def make_key(subject: str, body: str, version: str) -> str:
+        """Builds the cache key for a cleaned subject and body under a classifier version"""
+        digest = hashlib.sha256()
+        for part in (version, subject, body):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[bool]:
+        """Returns the cached verdict, or None if it is missing or expired"""
+        try:
+            with self._lock:
+                row = self._connection.execute(
+                    "SELECT verdict FROM verdicts WHERE key = ? AND created >= ?",
+                    (key, time.time() - self.ttl_seconds),
+                ).fetchone()
+            return bool(row[0]) if row else None
+        except sqlite3.Error as e:
+            logger.error(f"Error reading verdict cache {self.path}: {e}")
+            return None
+
+    def put(self, key: str, verdict: bool):
+        """Stores a verdict, periodically dropping expired entries and the oldest ones over the cap"""
+        try:
+            with self._lock:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO verdicts (key, verdict, created) VALUES (?, ?, ?)",
+                    (key, int(verdict), time.time()),
+                )
+                self._writes += 1
+                if self._writes % self.PRUNE_INTERVAL == 0:
+                    self._prune()
+        except sqlite3.Error as e:
+            logger.error(f"Error writing verdict cache {self.path}: {e}")
+
+    def _prune(self):
+        """Deletes expired entries, then the oldest entries beyond max_entries. Caller holds the lock"""
+        self._connection.execute("DELETE FROM verdicts WHERE created < ?", (time.time() - self.ttl_seconds,))
+        self._connection.execute(
+            "DELETE FROM verdicts WHERE key IN (SELECT key FROM verdicts ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def close(self):
+        """Closes the database connection"""
+        with self._lock:
+            self._connection.close()